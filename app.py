@@ -1,8 +1,10 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
 from flask_wtf import FlaskForm
+from sqlalchemy import event
 from wtforms import StringField, TextAreaField, SelectField
 from wtforms.validators import DataRequired, Email, Length, Optional
 
+from fast_json import OrjsonProvider
 from config import Config
 from models import db, Customer, Interaction
 
@@ -11,10 +13,14 @@ def create_app(config_class=Config):
     """Application factory."""
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
 
     db.init_app(app)
 
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _enable_sqlite_wal)
+
         # Import Voice AI models to register them
         from voice_ai_models import VoiceAgent, CallSession, CallQueue, LeadScore
         db.create_all()
@@ -28,6 +34,13 @@ def create_app(config_class=Config):
     return app
 
 
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    """Use SQLite's WAL journal so readers do not block bulk writes."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.close()
+
+
 class CustomerForm(FlaskForm):
     """Form for customer creation/editing."""
 
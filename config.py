@@ -3,14 +3,34 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).parent
 
+_DATABASE_URL = os.environ.get(
+    'DATABASE_URL',
+    f"sqlite:///{BASE_DIR / 'crm.db'}"
+)
+
+
+def _engine_options(database_url):
+    """Connection pool settings; stale connections are detected before use."""
+    options = {'pool_pre_ping': True}
+    if not database_url.startswith('sqlite'):
+        options.update({
+            'pool_size': 20,
+            'max_overflow': 40,
+            'pool_recycle': 1800,
+            'pool_use_lifo': True,
+        })
+    return options
+
 
 class Config:
     """Application configuration."""
 
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-    SQLALCHEMY_DATABASE_URI = os.environ.get(
-        'DATABASE_URL',
-        f"sqlite:///{BASE_DIR / 'crm.db'}"
-    )
+    SQLALCHEMY_DATABASE_URI = _DATABASE_URL
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(_DATABASE_URL)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
+
+    # Pre-open TLS connections to the voice AI providers when a gunicorn
+    # worker starts (see gunicorn.conf.py); off by default
+    VOICE_AI_WARMUP = os.environ.get('VOICE_AI_WARMUP', 'false').lower() in ('1', 'true', 'yes')
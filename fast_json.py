@@ -0,0 +1,45 @@
+"""
+Schnelle JSON-(De)Serialisierung auf Basis von orjson.
+Stellt loads/dumps_bytes sowie einen Flask JSON-Provider bereit.
+"""
+
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# Optionen für API-Antworten (jsonify); naive Datetimes aus der DB sind UTC
+RESPONSE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+loads = orjson.loads
+JSONDecodeError = orjson.JSONDecodeError
+
+
+def dumps_bytes(obj, option: int = RESPONSE_OPTIONS) -> bytes:
+    """Serialisiert direkt zu UTF-8 bytes (z.B. für Streaming-Antworten)."""
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+def _default(obj):
+    """Fallback für Typen, die orjson nicht nativ kennt."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON-Provider: jsonify und request.get_json laufen über orjson."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,15 @@
+"""Gunicorn settings (loaded automatically from the working directory)."""
+
+import threading
+
+
+def post_worker_init(worker):
+    """Pre-open TLS connections to the voice AI providers in each worker.
+
+    Runs after the fork, so every worker warms its own connection pool.
+    """
+    if not worker.wsgi.config.get('VOICE_AI_WARMUP'):
+        return
+
+    from voice_ai_service import warmup_providers
+    threading.Thread(target=warmup_providers, name='voice-ai-warmup', daemon=True).start()
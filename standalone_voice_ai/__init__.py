@@ -34,4 +34,5 @@ __author__ = 'Voice AI Sales System'
 from .agent import VoiceAISalesAgent
 from .config import VoiceAIConfig
 from .importer import ContactImporter, ContactExporter
+from .shared_contacts import SharedContactTable
 from .api_client import VoiceAIAPIClient
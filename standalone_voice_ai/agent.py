@@ -11,7 +11,8 @@ from typing import List, Dict, Optional, Callable
 from dataclasses import dataclass, field
 
 from .config import VoiceAIConfig, DEFAULT_PROMPTS
-from .importer import Contact, ContactImporter, ContactExporter, import_contacts
+from .importer import Contact, ContactImporter, ContactExporter, import_contacts, _utc_timestamp
+from .shared_contacts import SharedContactTable
 
 
 # Logger Setup
@@ -197,6 +198,16 @@ class VoiceAISalesAgent:
         else:
             return exporter.to_json(filepath)
 
+    def share_contacts(self) -> SharedContactTable:
+        """
+        Legt die Kontakte spaltenweise in Shared Memory ab.
+
+        Worker-Prozesse hängen sich mit SharedContactTable.attach(table.name)
+        an, statt eine gepickelte Kontaktliste zu kopieren. Der Aufrufer
+        ist für close() und unlink() verantwortlich.
+        """
+        return SharedContactTable.create(self.contacts)
+
     def clear_contacts(self):
         """Löscht alle Kontakte."""
         self.contacts = []
@@ -299,9 +310,9 @@ class VoiceAISalesAgent:
 
     def _wait_for_completion(self, call_id: str, timeout: int = 600) -> CallResult:
         """Wartet auf Anruf-Abschluss."""
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
 
-        while time.time() - start_time < timeout:
+        while time.monotonic() < deadline:
             result = self.provider_client.get_call_status(call_id)
 
             if result.status in ['completed', 'failed', 'no_answer', 'busy']:
@@ -352,7 +363,7 @@ class VoiceAISalesAgent:
     def export_results(self, filepath: str) -> str:
         """Exportiert Anruf-Ergebnisse als JSON."""
         data = {
-            'exported_at': datetime.now().isoformat(),
+            'exported_at': _utc_timestamp(),
             'stats': self.get_stats(),
             'results': [r.to_dict() for r in self.call_results]
         }
@@ -5,6 +5,8 @@ Konfiguration für alle Provider und Sprachen
 
 import os
 import json
+from functools import lru_cache
+from types import MappingProxyType
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Optional
 from pathlib import Path
@@ -123,7 +125,7 @@ class VoiceAIConfig:
 # STANDARD SYSTEM PROMPTS
 # =============================================================================
 
-DEFAULT_PROMPTS = {
+DEFAULT_PROMPTS = MappingProxyType({
     'de': """Du bist ein freundlicher Verkaufsberater. Sprich natürlich wie ein Mensch.
 
 WICHTIG - Klinge menschlich:
@@ -195,14 +197,14 @@ Ako nije zainteresovan: Ljubazno se pozdravi, ostavi vrata otvorena.""",
 
 Ако је заинтересован: Договори термин или пошаљи понуду.
 Ако није заинтересован: Љубазно се поздрави, остави врата отворена."""
-}
+})
 
 
 # =============================================================================
 # STIMMEN-PRESETS
 # =============================================================================
 
-VOICE_PRESETS = {
+_RAW_VOICE_PRESETS = {
     'de': {
         'elevenlabs': [
             {'id': 'pNInz6obpgDQGcFmaJgB', 'name': 'Adam', 'gender': 'male'},
@@ -230,9 +232,22 @@ VOICE_PRESETS = {
 }
 
 
-def get_voice_presets(language: str, provider: str = None) -> List[Dict]:
-    """Gibt verfügbare Stimmen für eine Sprache zurück."""
-    presets = VOICE_PRESETS.get(language, {})
+# Read-only Sicht: Listen werden zu Tupeln, Dicts zu MappingProxyType
+VOICE_PRESETS = MappingProxyType({
+    lang: MappingProxyType({
+        prov: tuple(MappingProxyType(voice) for voice in voices)
+        for prov, voices in provs.items()
+    })
+    for lang, provs in _RAW_VOICE_PRESETS.items()
+})
+
+_EMPTY_PRESETS = MappingProxyType({})
+
+
+@lru_cache(maxsize=32)
+def get_voice_presets(language: str, provider: str = None):
+    """Gibt verfügbare Stimmen für eine Sprache zurück (read-only)."""
+    presets = VOICE_PRESETS.get(language, _EMPTY_PRESETS)
     if provider:
-        return presets.get(provider, [])
+        return presets.get(provider, ())
     return presets
@@ -5,13 +5,120 @@ Unterstützt CSV, JSON, Excel und API-Import
 
 import csv
 import json
-from datetime import datetime
-from typing import List, Dict, Optional, Generator
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import attrgetter
+from typing import List, Dict, Optional, Generator, Callable, Iterable, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import io
 
 
+def _utc_timestamp() -> str:
+    """ISO-8601 UTC-Zeitstempel (Mikrosekunden) ohne datetime-Umweg."""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{nanos // 1000:06d}Z'
+
+
+def _is_ascii_compatible(encoding: str) -> bool:
+    """Prüft, ob Zeilenumbrüche im Encoding als einzelnes b'\\n' erscheinen."""
+    return '\n'.encode(encoding) == b'\n'
+
+
+def _iter_mmap_lines(mm: mmap.mmap, start: int, end: int,
+                     encoding: str) -> Generator[str, None, None]:
+    """Liefert dekodierte Zeilen aus dem Byte-Bereich [start, end) einer mmap."""
+    mm.seek(start)
+    readline = mm.readline
+    while mm.tell() < end:
+        line = readline()
+        if not line:
+            break
+        yield line.decode(encoding)
+
+
+def _import_csv_shard(filepath: str, start: int, end: int, header: List[str],
+                      mapping: Dict[str, List[str]], deduplicate: bool, delimiter: str,
+                      encoding: str) -> Tuple[List['Contact'], List[Tuple[int, str]], int, int]:
+    """Worker für import_csv_sharded: parst einen Byte-Bereich der Datei."""
+    importer = ContactImporter(mapping, deduplicate=deduplicate)
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            reader = csv.reader(_iter_mmap_lines(mm, start, end, encoding),
+                                delimiter=delimiter)
+            contacts, errors, skipped = importer._parse_csv_rows(
+                reader, importer._get_row_parser(header))
+            return contacts, errors, skipped, reader.line_num
+
+
+_http_session = None
+
+
+def _get_http_session():
+    """Gemeinsame requests.Session mit Connection-Pool und Retry (lazy)."""
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
+
+
+# Erlaubte Kontakt-Sprachen
+_LANGUAGES = frozenset(('de', 'bs', 'sr', 'en'))
+
+# Duplikat-Prüfung im generierten Parser (nur bei deduplicate=True)
+_ROW_PARSER_DEDUPE = """    if phone in _seen_phones:
+        return None
+    _seen_phones.add(phone)
+"""
+
+# Vorlage für den pro Datei-Schema generierten Zeilen-Parser
+_ROW_PARSER_TEMPLATE = """
+def _parse(row):
+    if len(row) < {width}:
+        row = row + [''] * ({width} - len(row))
+    phone = {phone}.strip()
+    if not phone:
+        return None
+    phone = _clean_phone(phone)
+    if not phone:
+        return None
+{dedupe}    priority = {priority}.strip()
+    try:
+        priority = int(priority) if priority else 5
+        priority = max(1, min(10, priority))
+    except (ValueError, TypeError):
+        priority = 5
+    language = {language}.strip() or 'de'
+    if language not in _LANGUAGES:
+        language = 'de'
+    return Contact(
+        name={name}.strip() or 'Unbekannt',
+        phone=phone,
+        email={email}.strip(),
+        company={company}.strip(),
+        language=language,
+        notes={notes}.strip(),
+        priority=priority
+    )
+"""
+
+
 @dataclass
 class Contact:
     """Kontakt-Datenstruktur."""
@@ -65,50 +172,148 @@ class ContactImporter:
         'priority': ['priority', 'Priority', 'priorität', 'Priorität', 'prio'],
     }
 
-    def __init__(self, column_mapping: Dict[str, List[str]] = None):
+    def __init__(self, column_mapping: Dict[str, List[str]] = None,
+                 deduplicate: bool = False):
+        """
+        Args:
+            column_mapping: Spalten-Mapping (Standard: DEFAULT_MAPPING)
+            deduplicate: Zeilen mit bereits gesehener (bereinigter)
+                Telefonnummer überspringen, bevor ein Contact erzeugt wird
+        """
         self.mapping = column_mapping or self.DEFAULT_MAPPING
+        self.deduplicate = deduplicate
         self.errors = []
         self.imported_count = 0
         self.skipped_count = 0
+        self._seen_phones = set()
+        self._row_parsers: Dict[tuple, Callable[[List[str]], Optional[Contact]]] = {}
 
     def import_csv(self, filepath: str, delimiter: str = ',',
                   encoding: str = 'utf-8') -> List[Contact]:
-        """Importiert Kontakte aus CSV-Datei."""
+        """
+        Importiert Kontakte aus CSV-Datei.
+
+        ASCII-kompatible Encodings werden per mmap gelesen, sodass der
+        Kernel die Datei seitenweise einblendet statt sie zu puffern.
+        """
+        if not _is_ascii_compatible(encoding):
+            with open(filepath, 'r', encoding=encoding, newline='') as f:
+                return self._import_csv_lines(f, delimiter)
+
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._import_csv_lines(
+                    _iter_mmap_lines(mm, 0, len(mm), encoding), delimiter)
+
+    def import_csv_sharded(self, filepath: str, delimiter: str = ',',
+                          encoding: str = 'utf-8',
+                          workers: int = None) -> List[Contact]:
+        """
+        Importiert eine große CSV-Datei parallel in mehreren Prozessen.
+
+        Die Datei wird an Zeilenumbrüchen in etwa gleich große Byte-Bereiche
+        aufgeteilt, die jeder Worker per mmap selbst parst. Mehrzeilige
+        Felder (Zeilenumbrüche in Anführungszeichen) werden daher nicht
+        unterstützt - dafür import_csv verwenden.
+        """
+        if not _is_ascii_compatible(encoding):
+            raise ValueError(f"Encoding nicht für Sharding geeignet: {encoding}")
+
+        workers = workers or os.cpu_count() or 1
+
+        with open(filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header_end = mm.find(b'\n') + 1 or size
+                header = next(csv.reader([mm[:header_end].decode(encoding)],
+                                         delimiter=delimiter))
+                bounds = [header_end]
+                step = max(1, (size - header_end) // workers)
+                for i in range(1, workers):
+                    target = header_end + i * step
+                    if target <= bounds[-1]:
+                        continue
+                    pos = mm.find(b'\n', target)
+                    if pos == -1:
+                        break
+                    bounds.append(pos + 1)
+                bounds.append(size)
+
+        shards = [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+        if not shards:
+            return []
+
         contacts = []
+        line_offset = 1  # Header-Zeile
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            results = pool.map(
+                _import_csv_shard,
+                repeat(filepath), [s for s, _ in shards], [e for _, e in shards],
+                repeat(header), repeat(self.mapping), repeat(self.deduplicate),
+                repeat(delimiter), repeat(encoding)
+            )
+            for shard_contacts, errors, skipped, line_count in results:
+                if self.deduplicate:
+                    # Worker kennen nur ihre eigenen Nummern
+                    unique = []
+                    for contact in shard_contacts:
+                        if contact.phone in self._seen_phones:
+                            skipped += 1
+                        else:
+                            self._seen_phones.add(contact.phone)
+                            unique.append(contact)
+                    shard_contacts = unique
+                contacts.extend(shard_contacts)
+                self.imported_count += len(shard_contacts)
+                self.skipped_count += skipped
+                self.errors.extend(f"Zeile {line_offset + line}: {error}"
+                                   for line, error in errors)
+                line_offset += line_count
 
-        with open(filepath, 'r', encoding=encoding) as f:
-            reader = csv.DictReader(f, delimiter=delimiter)
-
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    contact = self._row_to_contact(row)
-                    if contact:
-                        contacts.append(contact)
-                        self.imported_count += 1
-                    else:
-                        self.skipped_count += 1
-                except Exception as e:
-                    self.errors.append(f"Zeile {row_num}: {str(e)}")
-                    self.skipped_count += 1
+        return contacts
 
+    def _import_csv_lines(self, lines: Iterable[str], delimiter: str) -> List[Contact]:
+        """Parst CSV-Zeilen inkl. Header und aktualisiert die Statistik."""
+        reader = csv.reader(lines, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return []
+
+        contacts, errors, skipped = self._parse_csv_rows(reader, self._get_row_parser(header))
+        self.imported_count += len(contacts)
+        self.skipped_count += skipped
+        self.errors.extend(f"Zeile {line}: {error}" for line, error in errors)
         return contacts
 
-    def import_csv_string(self, csv_content: str, delimiter: str = ',') -> List[Contact]:
-        """Importiert Kontakte aus CSV-String."""
+    def _parse_csv_rows(self, reader, parse_row: Callable[[List[str]], Optional[Contact]]
+                        ) -> Tuple[List[Contact], List[Tuple[int, str]], int]:
+        """Parst Datenzeilen; liefert (Kontakte, (Zeile, Fehler)-Liste, übersprungen)."""
         contacts = []
-        reader = csv.DictReader(io.StringIO(csv_content), delimiter=delimiter)
+        errors = []
+        skipped = 0
 
-        for row_num, row in enumerate(reader, start=2):
+        for row in reader:
+            if not row:
+                continue
             try:
-                contact = self._row_to_contact(row)
+                contact = parse_row(row)
                 if contact:
                     contacts.append(contact)
-                    self.imported_count += 1
+                else:
+                    skipped += 1
             except Exception as e:
-                self.errors.append(f"Zeile {row_num}: {str(e)}")
-                self.skipped_count += 1
+                errors.append((reader.line_num, str(e)))
+                skipped += 1
 
-        return contacts
+        return contacts, errors, skipped
+
+    def import_csv_string(self, csv_content: str, delimiter: str = ',') -> List[Contact]:
+        """Importiert Kontakte aus CSV-String."""
+        return self._import_csv_lines(io.StringIO(csv_content, newline=''), delimiter)
 
     def import_json(self, filepath: str) -> List[Contact]:
         """Importiert Kontakte aus JSON-Datei."""
@@ -141,9 +346,11 @@ class ContactImporter:
     def import_from_api(self, api_url: str, headers: Dict = None,
                        contacts_key: str = 'data') -> List[Contact]:
         """Importiert Kontakte von einer API."""
-        import requests
-
-        response = requests.get(api_url, headers=headers or {})
+        response = _get_http_session().get(
+            api_url,
+            headers={**(headers or {}), 'Accept-Encoding': 'gzip'},
+            timeout=(5, 30)
+        )
         response.raise_for_status()
 
         data = response.json()
@@ -169,6 +376,12 @@ class ContactImporter:
         if not phone:
             return None
 
+        # Duplikate früh verwerfen
+        if self.deduplicate:
+            if phone in self._seen_phones:
+                return None
+            self._seen_phones.add(phone)
+
         # Extrahiere andere Felder
         name = self._find_value(row, 'name') or 'Unbekannt'
         email = self._find_value(row, 'email') or ''
@@ -185,7 +398,7 @@ class ContactImporter:
             priority = 5
 
         # Validiere Sprache
-        if language not in ['de', 'bs', 'sr', 'en']:
+        if language not in _LANGUAGES:
             language = 'de'
 
         return Contact(
@@ -198,6 +411,45 @@ class ContactImporter:
             priority=priority
         )
 
+    def _get_row_parser(self, header: List[str]) -> Callable[[List[str]], Optional[Contact]]:
+        """
+        Liefert einen für dieses Spalten-Schema generierten Zeilen-Parser.
+
+        Die Spalten-Indizes werden einmal pro Header aufgelöst und fest in
+        den Quelltext eingesetzt; das Ergebnis entspricht _row_to_contact.
+        """
+        key = tuple(header)
+        parser = self._row_parsers.get(key)
+        if parser is None:
+            parser = self._compile_row_parser(header)
+            self._row_parsers[key] = parser
+        return parser
+
+    def _compile_row_parser(self, header: List[str]) -> Callable[[List[str]], Optional[Contact]]:
+        """Generiert und kompiliert den Parser-Quelltext für einen Header."""
+        # Wie bei csv.DictReader gewinnt bei doppelten Spaltennamen die letzte
+        columns = {name: index for index, name in enumerate(header)}
+
+        def lookup(field: str) -> str:
+            indices = [columns[name] for name in self.mapping.get(field, [field])
+                       if name in columns]
+            return '(' + ' or '.join([f'row[{i}]' for i in indices] + ["''"]) + ')'
+
+        source = _ROW_PARSER_TEMPLATE.format(
+            width=len(header),
+            dedupe=_ROW_PARSER_DEDUPE if self.deduplicate else '',
+            **{field: lookup(field) for field in
+               ('phone', 'name', 'email', 'company', 'language', 'notes', 'priority')}
+        )
+        namespace = {
+            'Contact': Contact,
+            '_clean_phone': self._clean_phone,
+            '_LANGUAGES': _LANGUAGES,
+            '_seen_phones': self._seen_phones,
+        }
+        exec(compile(source, '<row_parser>', 'exec'), namespace)
+        return namespace['_parse']
+
     def _find_value(self, row: Dict, field: str) -> Optional[str]:
         """Findet Wert basierend auf Spalten-Mapping."""
         possible_names = self.mapping.get(field, [field])
@@ -252,29 +504,31 @@ class ContactExporter:
 
     def to_csv(self, filepath: str = None, include_stats: bool = False) -> str:
         """Exportiert zu CSV."""
-        output = io.StringIO()
         fieldnames = ['name', 'phone', 'email', 'company', 'language',
                      'priority', 'status', 'notes', 'call_count', 'last_called']
-
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for contact in self.contacts:
-            row = {k: getattr(contact, k, '') for k in fieldnames}
-            writer.writerow(row)
-
-        csv_content = output.getvalue()
+        get_row = attrgetter(*fieldnames)
+
+        # Direkt UTF-8 in einen Byte-Puffer schreiben (kein zweites Encoding)
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='',
+                                write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(fieldnames)
+        writer.writerows(get_row(contact) for contact in self.contacts)
+        text.flush()
+        csv_bytes = buffer.getvalue()
+        text.detach()
 
         if filepath:
-            with open(filepath, 'w', encoding='utf-8', newline='') as f:
-                f.write(csv_content)
+            with open(filepath, 'wb') as f:
+                f.write(csv_bytes)
 
-        return csv_content
+        return csv_bytes.decode('utf-8')
 
     def to_json(self, filepath: str = None, pretty: bool = True) -> str:
         """Exportiert zu JSON."""
         data = {
-            'exported_at': datetime.now().isoformat(),
+            'exported_at': _utc_timestamp(),
             'total_contacts': len(self.contacts),
             'contacts': [c.to_dict() for c in self.contacts]
         }
@@ -0,0 +1,186 @@
+"""
+Shared Contact Table
+Spaltenorientierte (SoA) Kontaktliste in Shared Memory für Multi-Prozess-Dialer
+"""
+
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Dict, Iterator, Optional
+
+from .importer import Contact
+
+
+# Spalten-Layout: Text-Spalten als UTF-8-Blob + Offsets, Zahlen als int64
+_STR_COLUMNS = ('name', 'phone', 'email', 'company', 'language', 'notes', 'status')
+_NULLABLE_STR_COLUMNS = ('id', 'last_called')
+_JSON_COLUMNS = ('tags', 'custom_data')
+_INT_COLUMNS = ('priority', 'call_count')
+
+_HEADER_SIZE = struct.Struct('<I')
+_ALIGNMENT = 8
+
+
+def _align(position: int) -> int:
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedContactTable:
+    """
+    Read-only Kontakt-Tabelle in multiprocessing.shared_memory.
+
+    Jede Spalte liegt genau einmal im Speicher; Worker-Prozesse hängen
+    sich per Name an und erzeugen Contact-Objekte erst beim Zugriff.
+
+    Beispiel:
+        table = SharedContactTable.create(agent.contacts)
+        # im Worker-Prozess:
+        view = SharedContactTable.attach(table.name)
+        contact = view[42]
+        view.close()
+        # im Eltern-Prozess, wenn alle Worker fertig sind:
+        table.close()
+        table.unlink()
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self._shm = shm
+        buf = shm.buf
+        (header_len,) = _HEADER_SIZE.unpack_from(buf, 0)
+        start = _HEADER_SIZE.size
+        header = json.loads(bytes(buf[start:start + header_len]))
+
+        self._rows = header['rows']
+        self._segments: Dict[str, Dict[str, memoryview]] = {}
+        for column, parts in header['columns'].items():
+            views = {}
+            for part, (offset, length, fmt) in parts.items():
+                view = buf[offset:offset + length]
+                views[part] = view.cast(fmt) if fmt != 'B' else view
+            self._segments[column] = views
+
+    @property
+    def name(self) -> str:
+        """Name des Shared-Memory-Blocks (für attach in anderen Prozessen)."""
+        return self._shm.name
+
+    @classmethod
+    def create(cls, contacts: List[Contact]) -> 'SharedContactTable':
+        """Legt die Tabelle für die gegebenen Kontakte in Shared Memory an."""
+        rows = len(contacts)
+        segments = []  # (column, part, fmt, bytes)
+
+        for column in _STR_COLUMNS + _NULLABLE_STR_COLUMNS + _JSON_COLUMNS:
+            offsets = array('Q', [0])
+            blob = bytearray()
+            nulls = bytearray(rows) if column in _NULLABLE_STR_COLUMNS else None
+            for i, contact in enumerate(contacts):
+                value = getattr(contact, column)
+                if column in _JSON_COLUMNS:
+                    value = json.dumps(value, ensure_ascii=False)
+                elif value is None:
+                    if nulls is not None:
+                        nulls[i] = 1
+                    value = ''
+                blob += value.encode('utf-8')
+                offsets.append(len(blob))
+            segments.append((column, 'offsets', 'Q', offsets.tobytes()))
+            segments.append((column, 'data', 'B', bytes(blob)))
+            if nulls is not None:
+                segments.append((column, 'nulls', 'B', bytes(nulls)))
+
+        for column in _INT_COLUMNS:
+            values = array('q', (getattr(contact, column) for contact in contacts))
+            segments.append((column, 'values', 'q', values.tobytes()))
+
+        # Header-Größe ist erst nach Offset-Berechnung bekannt; Offsets
+        # relativ zum Datenbereich berechnen und danach verschieben.
+        relative = []
+        position = 0
+        for column, part, fmt, data in segments:
+            position = _align(position)
+            relative.append((column, part, fmt, position, data))
+            position += len(data)
+        data_size = position
+
+        def build_header(base: int) -> bytes:
+            columns: Dict[str, Dict[str, list]] = {}
+            for column, part, fmt, offset, data in relative:
+                columns.setdefault(column, {})[part] = [base + offset, len(data), fmt]
+            return json.dumps({'rows': rows, 'columns': columns}).encode('utf-8')
+
+        # Basis stabilisieren (Länge der Offset-Zahlen beeinflusst Header-Länge)
+        base = _align(_HEADER_SIZE.size)
+        while True:
+            header = build_header(base)
+            needed = _align(_HEADER_SIZE.size + len(header))
+            if needed == base:
+                break
+            base = needed
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, base + data_size))
+        buf = shm.buf
+        _HEADER_SIZE.pack_into(buf, 0, len(header))
+        buf[_HEADER_SIZE.size:_HEADER_SIZE.size + len(header)] = header
+        for column, part, fmt, offset, data in relative:
+            buf[base + offset:base + offset + len(data)] = data
+
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedContactTable':
+        """Hängt sich an eine bestehende Tabelle an (z.B. im Worker-Prozess)."""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __iter__(self) -> Iterator[Contact]:
+        for i in range(self._rows):
+            yield self._build(i)
+
+    def __getitem__(self, index: int) -> Contact:
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError('contact index out of range')
+        return self._build(index)
+
+    def _string(self, column: str, index: int) -> Optional[str]:
+        parts = self._segments[column]
+        nulls = parts.get('nulls')
+        if nulls is not None and nulls[index]:
+            return None
+        offsets = parts['offsets']
+        return bytes(parts['data'][offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def column(self, column: str) -> list:
+        """Gibt eine einzelne Spalte als Liste zurück, ohne Contacts zu bauen."""
+        if column in _INT_COLUMNS:
+            return self._segments[column]['values'].tolist()
+        values = [self._string(column, i) for i in range(self._rows)]
+        if column in _JSON_COLUMNS:
+            return [json.loads(v) for v in values]
+        return values
+
+    def _build(self, index: int) -> Contact:
+        fields = {column: self._string(column, index)
+                  for column in _STR_COLUMNS + _NULLABLE_STR_COLUMNS}
+        for column in _JSON_COLUMNS:
+            fields[column] = json.loads(self._string(column, index))
+        for column in _INT_COLUMNS:
+            fields[column] = self._segments[column]['values'][index]
+        return Contact(**fields)
+
+    def close(self):
+        """Gibt die Views frei und schließt den Shared-Memory-Block."""
+        for parts in self._segments.values():
+            for view in parts.values():
+                view.release()
+        self._segments = {}
+        self._shm.close()
+
+    def unlink(self):
+        """Entfernt den Shared-Memory-Block (nur im erzeugenden Prozess)."""
+        self._shm.unlink()
@@ -0,0 +1,54 @@
+"""
+Tests für den generierten CSV-Zeilen-Parser des Kontakt-Importers.
+"""
+
+import csv
+import io
+from dataclasses import astuple
+
+import pytest
+
+from standalone_voice_ai.importer import ContactImporter
+
+
+# Doppelte Spalte 'name' (letzte gewinnt), zwei Telefon-Spalten aus dem
+# Mapping, kurze Zeilen, Whitespace-Werte und ein mehrzeiliges Feld
+CSV_CONTENT = (
+    'name,phone,Telefon,email,name,language,priority,notes,company\n'
+    'Erster,+49 151 1111111,,a@example.de,Max Mustermann,de,3,Notiz,Firma GmbH\n'
+    'X,,0049 152 2222222,  ,   ,bs,abc,"Zeile 1\nZeile 2",  \n'
+    'T,   ,0049 153 2222222,,Nur Leerzeichen\n'
+    'Y,+387 61 333 333\n'
+    'Z,(0151) 444-4444,,,Ana,sr,42\n'
+    ',,,,,,,,\n'
+    '\n'
+    'W,+49 151 1111111,,,Duplikat,en,0,"mit ""Zitat""",Firma\n'
+    'V,12,,,Zu kurz,xx,7\n'
+    'U,  +43 660 5555555  ,,,  ,  ,  ,  ,  \n'
+)
+
+
+def _reference_contacts(csv_content, **kwargs):
+    """Ergebnis des ursprünglichen Pfads: csv.DictReader + _row_to_contact."""
+    importer = ContactImporter(**kwargs)
+    rows = csv.DictReader(io.StringIO(csv_content, newline=''))
+    return [contact for contact in map(importer._row_to_contact, rows) if contact]
+
+
+@pytest.mark.parametrize('deduplicate', [False, True])
+def test_generated_row_parser_matches_row_to_contact(deduplicate):
+    expected = _reference_contacts(CSV_CONTENT, deduplicate=deduplicate)
+    contacts = ContactImporter(deduplicate=deduplicate).import_csv_string(CSV_CONTENT)
+
+    assert expected
+    assert [astuple(c) for c in contacts] == [astuple(c) for c in expected]
+
+
+def test_import_csv_matches_import_csv_string(tmp_path):
+    path = tmp_path / 'contacts.csv'
+    path.write_text(CSV_CONTENT, encoding='utf-8', newline='')
+
+    from_file = ContactImporter().import_csv(str(path))
+    from_string = ContactImporter().import_csv_string(CSV_CONTENT)
+
+    assert [astuple(c) for c in from_file] == [astuple(c) for c in from_string]
@@ -0,0 +1,126 @@
+"""
+Tests für die Webhook-Queue (webhook_events) und den Worker.
+"""
+
+import pytest
+from flask import Flask
+
+from models import db
+from voice_ai_models import CallSession, WebhookEvent
+from voice_ai_service import VoiceAIService
+
+
+VAPI_END_OF_CALL = {
+    'message': {
+        'type': 'end-of-call-report',
+        'transcript': 'Agent: Guten Tag! Kunde: Hallo.',
+        'summary': 'Kurzes Gespräch',
+        'recordingUrl': 'https://example.com/rec.mp3',
+        'cost': 0.12,
+        'call': {
+            'id': 'vapi-call-1',
+            'status': 'ended',
+            'startedAt': '2024-01-01T10:00:00Z',
+            'endedAt': '2024-01-01T10:02:30Z',
+        },
+    },
+}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_enqueued_webhook_is_processed_by_worker(app):
+    service = VoiceAIService(db.session)
+
+    service.enqueue_webhook('vapi', VAPI_END_OF_CALL)
+    assert service.process_webhook_events() == 1
+
+    event = WebhookEvent.query.one()
+    assert event.payload == VAPI_END_OF_CALL
+    assert event.processed_at is not None
+    assert event.error is None
+
+    session = CallSession.query.filter_by(provider_call_id='vapi-call-1').one()
+    assert session.direction == 'inbound'
+    assert session.status == 'ended'
+    assert session.duration_seconds == 150
+    assert session.transcript == VAPI_END_OF_CALL['message']['transcript']
+
+    # Nichts mehr offen
+    assert service.process_webhook_events() == 0
+
+
+@pytest.mark.parametrize('provider, payload, expected', [
+    ('retell', {
+        'event': 'call_ended',
+        'call': {
+            'call_id': 'retell-call-1',
+            'call_status': 'ended',
+            'end_timestamp': 1704103350000,
+            'duration_ms': 65400,
+            'transcript': 'Hallo',
+            'call_analysis': {'user_sentiment': 'positive', 'call_summary': 'Interesse'},
+        },
+    }, {'status': 'ended', 'duration_seconds': 65, 'sentiment': 'positive',
+        'summary': 'Interesse', 'transcript': 'Hallo'}),
+    ('bland', {
+        'call_id': 'bland-call-1',
+        'status': 'completed',
+        'call_length': 90,
+        'price': 0.3,
+        'concatenated_transcript': 'Zdravo',
+        'analysis': {'sentiment': 'neutral'},
+    }, {'status': 'completed', 'duration_seconds': 90, 'sentiment': 'neutral',
+        'cost_amount': 0.3, 'transcript': 'Zdravo'}),
+])
+def test_handle_webhook_applies_payload_to_session(app, provider, payload, expected):
+    session = VoiceAIService(db.session).handle_webhook(provider, payload)
+
+    for attr, value in expected.items():
+        assert getattr(session, attr) == value
+
+
+def test_failed_commit_leaves_event_unprocessed(app, monkeypatch):
+    service = VoiceAIService(db.session)
+    service.enqueue_webhook('vapi', VAPI_END_OF_CALL)
+
+    # Der Commit, der processed_at schreiben soll, schlägt fehl
+    commit = db.session.commit
+
+    def failing_commit():
+        if any(getattr(obj, 'processed_at', None) for obj in db.session.dirty):
+            raise RuntimeError('commit failed')
+        commit()
+
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+    assert service.process_webhook_events() == 0
+
+    event = WebhookEvent.query.one()
+    assert event.processed_at is None
+    assert event.claimed_at is None
+    assert event.error == 'commit failed'
+    assert CallSession.query.count() == 0
+
+
+@pytest.mark.parametrize('body', [b'[1]', b'"x"', b'42', b'null'])
+def test_webhook_route_rejects_non_object_json(app, body):
+    from voice_ai_routes import register_voice_ai
+    register_voice_ai(app)
+
+    response = app.test_client().post('/api/voice/webhooks/vapi', data=body)
+
+    assert response.status_code == 400
+    assert WebhookEvent.query.count() == 0
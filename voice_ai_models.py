@@ -5,8 +5,29 @@ Unterstützt: Deutsch, Bosnisch, Serbisch
 """
 
 from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.mutable import MutableList
 from models import db
-import json
+
+
+def _json_type():
+    """
+    JSONB auf PostgreSQL, sonst generisches JSON (z.B. SQLite).
+    Liefert je Spalte eine eigene Instanz: MutableList.as_mutable registriert
+    den Typ global, eine geteilte Instanz würde jede Spalte zur Liste zwingen.
+    """
+    return db.JSON().with_variant(JSONB(), 'postgresql')
+
+
+def _fields_dict(obj, fields):
+    """
+    Baut ein dict aus den gegebenen Spalten.
+    Geladene Werte kommen direkt aus __dict__ (ohne Descriptor-Aufruf),
+    abgelaufene/deferred Attribute werden regulär über getattr nachgeladen.
+    Datetimes bleiben Objekte; orjson serialisiert sie in jsonify.
+    """
+    state = obj.__dict__
+    return {k: state[k] if k in state else getattr(obj, k) for k in fields}
 
 
 class VoiceAgent(db.Model):
@@ -24,7 +45,8 @@ class VoiceAgent(db.Model):
 
     # Sprach-Konfiguration
     primary_language = db.Column(db.String(10), default='de')  # de, bs, sr
-    supported_languages = db.Column(db.Text, default='["de", "bs", "sr"]')
+    supported_languages = db.Column(MutableList.as_mutable(_json_type()),
+                                    default=lambda: ['de', 'bs', 'sr'])
 
     # TTS Konfiguration
     tts_provider = db.Column(db.String(50), default='elevenlabs')  # elevenlabs, azure, playht
@@ -54,39 +76,33 @@ class VoiceAgent(db.Model):
                           onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
-    call_sessions = db.relationship('CallSession', backref='agent', lazy='dynamic',
+    call_sessions = db.relationship('CallSession', back_populates='agent', lazy='dynamic',
                                    cascade='all, delete-orphan')
 
-    def get_supported_languages(self):
-        return json.loads(self.supported_languages or '[]')
-
-    def set_supported_languages(self, languages):
-        self.supported_languages = json.dumps(languages)
+    _DICT_FIELDS = (
+        'id', 'name', 'provider', 'agent_id', 'primary_language',
+        'supported_languages', 'tts_provider', 'tts_voice_name', 'stt_provider',
+        'llm_provider', 'llm_model', 'phone_number', 'telephony_provider',
+        'is_active', 'created_at',
+    )
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'provider': self.provider,
-            'agent_id': self.agent_id,
-            'primary_language': self.primary_language,
-            'supported_languages': self.get_supported_languages(),
-            'tts_provider': self.tts_provider,
-            'tts_voice_name': self.tts_voice_name,
-            'stt_provider': self.stt_provider,
-            'llm_provider': self.llm_provider,
-            'llm_model': self.llm_model,
-            'phone_number': self.phone_number,
-            'telephony_provider': self.telephony_provider,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+        data = _fields_dict(self, self._DICT_FIELDS)
+        if data['supported_languages'] is None:
+            data['supported_languages'] = []
+        return data
 
 
 class CallSession(db.Model):
     """Anruf-Session mit Transkript und Analyse."""
 
     __tablename__ = 'call_sessions'
+    __table_args__ = (
+        # call_list: WHERE status = ? ORDER BY created_at DESC
+        db.Index('ix_call_sessions_status_created', 'status', 'created_at'),
+        # Dashboard / API: ORDER BY created_at DESC LIMIT n
+        db.Index('ix_call_sessions_created_at_desc', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -117,9 +133,11 @@ class CallSession(db.Model):
     # Sprache
     detected_language = db.Column(db.String(10))  # de, bs, sr
 
-    # Transkript
-    transcript = db.Column(db.Text)
-    transcript_segments = db.Column(db.Text)  # JSON mit Zeitstempeln
+    # Transkript (deferred: wird nur bei Zugriff bzw. undefer() geladen)
+    transcript = db.deferred(db.Column(db.Text))
+    transcript_segments = db.deferred(
+        db.Column(MutableList.as_mutable(_json_type()))  # Segmente mit Zeitstempeln
+    )
 
     # AI Analyse
     summary = db.Column(db.Text)
@@ -148,47 +166,44 @@ class CallSession(db.Model):
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
                           onupdate=lambda: datetime.now(timezone.utc))
 
-    # Relationship
+    # Relationships
+    # lazy='raise': Listen müssen den Agent explizit laden (selectinload)
+    agent = db.relationship('VoiceAgent', back_populates='call_sessions', lazy='raise')
     customer = db.relationship('Customer', backref='call_sessions')
 
-    def get_transcript_segments(self):
-        return json.loads(self.transcript_segments or '[]')
-
-    def set_transcript_segments(self, segments):
-        self.transcript_segments = json.dumps(segments, ensure_ascii=False)
+    _SUMMARY_FIELDS = (
+        'id', 'agent_id', 'customer_id', 'phone_to', 'status',
+        'duration_seconds', 'sentiment', 'outcome', 'created_at',
+    )
+    _DICT_FIELDS = (
+        'id', 'agent_id', 'customer_id', 'provider_call_id', 'direction',
+        'phone_from', 'phone_to', 'started_at', 'ended_at', 'duration_seconds',
+        'status', 'detected_language', 'transcript', 'summary', 'sentiment',
+        'sentiment_score', 'outcome', 'next_action', 'appointment_date',
+        'lead_score_after', 'recording_url', 'cost_amount', 'created_at',
+    )
+
+    def to_summary_dict(self):
+        """Kompakte Darstellung für Listen (nur per load_only geladene Spalten)."""
+        return _fields_dict(self, self._SUMMARY_FIELDS)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'agent_id': self.agent_id,
-            'customer_id': self.customer_id,
-            'provider_call_id': self.provider_call_id,
-            'direction': self.direction,
-            'phone_from': self.phone_from,
-            'phone_to': self.phone_to,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
-            'duration_seconds': self.duration_seconds,
-            'status': self.status,
-            'detected_language': self.detected_language,
-            'transcript': self.transcript,
-            'summary': self.summary,
-            'sentiment': self.sentiment,
-            'sentiment_score': self.sentiment_score,
-            'outcome': self.outcome,
-            'next_action': self.next_action,
-            'appointment_date': self.appointment_date.isoformat() if self.appointment_date else None,
-            'lead_score_after': self.lead_score_after,
-            'recording_url': self.recording_url,
-            'cost_amount': self.cost_amount,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+        return _fields_dict(self, self._DICT_FIELDS)
 
 
 class CallQueue(db.Model):
     """Warteschlange für ausgehende Anrufe."""
 
     __tablename__ = 'call_queue'
+    __table_args__ = (
+        # Queue-Polling/queue_list: WHERE status = 'pending' ORDER BY priority, created_at
+        # (partieller Index: enthält nur offene Einträge, bleibt klein)
+        db.Index('ix_callqueue_pending', 'priority', 'created_at',
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+        # queue_list: WHERE status = 'scheduled' ORDER BY scheduled_for
+        db.Index('ix_queue_status_scheduled', 'status', 'scheduled_for'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -224,19 +239,36 @@ class CallQueue(db.Model):
     customer = db.relationship('Customer', backref='queue_items')
     call_session = db.relationship('CallSession', backref='queue_item')
 
+    _DICT_FIELDS = (
+        'id', 'agent_id', 'customer_id', 'priority', 'scheduled_for',
+        'status', 'attempts', 'max_attempts', 'created_at',
+    )
+
     def to_dict(self):
-        return {
-            'id': self.id,
-            'agent_id': self.agent_id,
-            'customer_id': self.customer_id,
-            'customer_name': self.customer.name if self.customer else None,
-            'priority': self.priority,
-            'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None,
-            'status': self.status,
-            'attempts': self.attempts,
-            'max_attempts': self.max_attempts,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+        data = _fields_dict(self, self._DICT_FIELDS)
+        data['customer_name'] = self.customer.name if self.customer else None
+        return data
+
+
+class WebhookEvent(db.Model):
+    """Eingegangener Provider-Webhook; wird asynchron vom Worker verarbeitet."""
+
+    __tablename__ = 'webhook_events'
+    __table_args__ = (
+        # Worker: WHERE processed_at IS NULL ORDER BY id
+        db.Index('ix_webhook_events_processed_id', 'processed_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), nullable=False)  # vapi, retell, bland
+    payload = db.Column(_json_type(), nullable=False)
+
+    # Verarbeitung
+    received_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    claimed_at = db.Column(db.DateTime)  # von einem Worker übernommen
+    processed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
 
 
 class LeadScore(db.Model):
@@ -267,16 +299,11 @@ class LeadScore(db.Model):
 
     customer = db.relationship('Customer', backref='lead_score', uselist=False)
 
+    _DICT_FIELDS = (
+        'customer_id', 'overall_score', 'engagement_score', 'interest_score',
+        'urgency_score', 'predicted_outcome', 'conversion_probability',
+        'best_call_time', 'preferred_language', 'last_calculated',
+    )
+
     def to_dict(self):
-        return {
-            'customer_id': self.customer_id,
-            'overall_score': self.overall_score,
-            'engagement_score': self.engagement_score,
-            'interest_score': self.interest_score,
-            'urgency_score': self.urgency_score,
-            'predicted_outcome': self.predicted_outcome,
-            'conversion_probability': self.conversion_probability,
-            'best_call_time': self.best_call_time,
-            'preferred_language': self.preferred_language,
-            'last_calculated': self.last_calculated.isoformat() if self.last_calculated else None,
-        }
+        return _fields_dict(self, self._DICT_FIELDS)
@@ -3,80 +3,111 @@ Voice AI Sales Agent - API Routes für CRM Integration
 Webhooks für Vapi.ai, Retell.ai, Bland.ai
 """
 
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import (Blueprint, Response, request, jsonify, render_template, redirect,
+                   url_for, flash, stream_with_context)
+from flask.cli import AppGroup
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, BooleanField
 from wtforms.validators import DataRequired, Optional, Length
-from datetime import datetime, timezone
+from datetime import datetime
 from functools import wraps
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload, undefer
+import click
 import hmac
-import hashlib
 import os
+import time
 
+import fast_json
 from models import db, Customer
 from voice_ai_models import VoiceAgent, CallSession, CallQueue, LeadScore
-from voice_ai_service import VoiceAIService, SYSTEM_PROMPTS
+from voice_ai_service import VoiceAIService, SYSTEM_PROMPTS, WEBHOOK_PROVIDERS, get_provider
 
 
 # Blueprint erstellen
 voice_ai_bp = Blueprint('voice_ai', __name__, url_prefix='/voice-ai')
 voice_api_bp = Blueprint('voice_api', __name__, url_prefix='/api/voice')
 
+# Spalten für Anruf-Listen (Templates + to_summary_dict); ohne Transkripte
+_CALL_LIST_COLUMNS = (
+    CallSession.id,
+    CallSession.agent_id,
+    CallSession.customer_id,
+    CallSession.phone_to,
+    CallSession.direction,
+    CallSession.status,
+    CallSession.duration_seconds,
+    CallSession.sentiment,
+    CallSession.outcome,
+    CallSession.cost_amount,
+    CallSession.cost_currency,
+    CallSession.created_at,
+)
+
 
 # =============================================================================
 # FORMS
 # =============================================================================
 
+# Auswahllisten einmalig als Konstanten (nicht pro Formular-Instanz)
+_PROVIDER_CHOICES = (
+    ('vapi', 'Vapi.ai (Empfohlen)'),
+    ('retell', 'Retell.ai (Schnellste Latenz)'),
+    ('bland', 'Bland.ai (Sales-fokussiert)')
+)
+_LANGUAGE_CHOICES = (
+    ('de', 'Deutsch'),
+    ('bs', 'Bosnisch'),
+    ('sr', 'Serbisch')
+)
+_TTS_CHOICES = (
+    ('elevenlabs', 'ElevenLabs (Beste Qualität)'),
+    ('azure', 'Azure Neural (Alle Sprachen)'),
+    ('playht', 'PlayHT'),
+    ('openai', 'OpenAI TTS')
+)
+_STT_CHOICES = (
+    ('deepgram', 'Deepgram (Schnellste)'),
+    ('azure', 'Azure Speech'),
+    ('google', 'Google STT'),
+    ('whisper', 'OpenAI Whisper')
+)
+_LLM_PROVIDER_CHOICES = (
+    ('openai', 'OpenAI'),
+    ('anthropic', 'Anthropic Claude'),
+    ('groq', 'Groq (Llama)')
+)
+_LLM_MODEL_CHOICES = (
+    ('gpt-4o-mini', 'GPT-4o-mini (Schnell & Günstig)'),
+    ('gpt-4o', 'GPT-4o (Beste Qualität)'),
+    ('claude-3-haiku-20240307', 'Claude 3 Haiku'),
+    ('llama-3.1-70b-versatile', 'Llama 3.1 70B')
+)
+_TELEPHONY_CHOICES = (
+    ('twilio', 'Twilio'),
+    ('vonage', 'Vonage'),
+    ('plivo', 'Plivo')
+)
+
+
 class VoiceAgentForm(FlaskForm):
     """Form für Voice Agent Konfiguration."""
 
     name = StringField('Agent Name', validators=[DataRequired(), Length(max=100)])
-    provider = SelectField('Provider', choices=[
-        ('vapi', 'Vapi.ai (Empfohlen)'),
-        ('retell', 'Retell.ai (Schnellste Latenz)'),
-        ('bland', 'Bland.ai (Sales-fokussiert)')
-    ])
+    provider = SelectField('Provider', choices=_PROVIDER_CHOICES)
     api_key = StringField('API Key', validators=[Optional(), Length(max=500)])
 
-    primary_language = SelectField('Hauptsprache', choices=[
-        ('de', 'Deutsch'),
-        ('bs', 'Bosnisch'),
-        ('sr', 'Serbisch')
-    ])
-
-    tts_provider = SelectField('Text-to-Speech', choices=[
-        ('elevenlabs', 'ElevenLabs (Beste Qualität)'),
-        ('azure', 'Azure Neural (Alle Sprachen)'),
-        ('playht', 'PlayHT'),
-        ('openai', 'OpenAI TTS')
-    ])
+    primary_language = SelectField('Hauptsprache', choices=_LANGUAGE_CHOICES)
+
+    tts_provider = SelectField('Text-to-Speech', choices=_TTS_CHOICES)
     tts_voice_id = StringField('Voice ID', validators=[Optional()])
 
-    stt_provider = SelectField('Speech-to-Text', choices=[
-        ('deepgram', 'Deepgram (Schnellste)'),
-        ('azure', 'Azure Speech'),
-        ('google', 'Google STT'),
-        ('whisper', 'OpenAI Whisper')
-    ])
-
-    llm_provider = SelectField('LLM Provider', choices=[
-        ('openai', 'OpenAI'),
-        ('anthropic', 'Anthropic Claude'),
-        ('groq', 'Groq (Llama)')
-    ])
-    llm_model = SelectField('LLM Model', choices=[
-        ('gpt-4o-mini', 'GPT-4o-mini (Schnell & Günstig)'),
-        ('gpt-4o', 'GPT-4o (Beste Qualität)'),
-        ('claude-3-haiku-20240307', 'Claude 3 Haiku'),
-        ('llama-3.1-70b-versatile', 'Llama 3.1 70B')
-    ])
+    stt_provider = SelectField('Speech-to-Text', choices=_STT_CHOICES)
+
+    llm_provider = SelectField('LLM Provider', choices=_LLM_PROVIDER_CHOICES)
+    llm_model = SelectField('LLM Model', choices=_LLM_MODEL_CHOICES)
 
     phone_number = StringField('Telefonnummer', validators=[Optional(), Length(max=20)])
-    telephony_provider = SelectField('Telefonie', choices=[
-        ('twilio', 'Twilio'),
-        ('vonage', 'Vonage'),
-        ('plivo', 'Plivo')
-    ])
+    telephony_provider = SelectField('Telefonie', choices=_TELEPHONY_CHOICES)
 
     system_prompt = TextAreaField('System Prompt (Sales Script)', validators=[Optional()])
     is_active = BooleanField('Aktiv', default=True)
@@ -86,52 +117,95 @@ class VoiceAgentForm(FlaskForm):
 # API KEY AUTHENTICATION
 # =============================================================================
 
+# Erwarteter API-Key, einmalig beim Import gelesen
+_EXPECTED_API_KEY = (os.environ.get('VOICE_AI_API_KEY') or '').encode()
+
+
 def require_api_key(f):
     """Decorator für API-Key Authentifizierung."""
     @wraps(f)
     def decorated(*args, **kwargs):
-        api_key = request.headers.get('X-API-Key')
-        expected_key = os.environ.get('VOICE_AI_API_KEY')
-
-        if expected_key and api_key != expected_key:
-            return jsonify({'error': 'Invalid API key'}), 401
+        if _EXPECTED_API_KEY:
+            provided = request.headers.get('X-API-Key', '').encode()
+            if not hmac.compare_digest(provided, _EXPECTED_API_KEY):
+                return jsonify({'error': 'Invalid API key'}), 401
 
         return f(*args, **kwargs)
     return decorated
 
 
-def verify_webhook_signature(provider: str, payload: bytes, signature: str) -> bool:
-    """Verifiziert Webhook-Signatur."""
-    secret = os.environ.get(f'{provider.upper()}_WEBHOOK_SECRET', '')
-    if not secret:
-        return True  # Keine Signatur-Verifizierung konfiguriert
-
-    expected = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(signature, expected)
-
-
 # =============================================================================
 # WEB UI ROUTES
 # =============================================================================
 
+# Dashboard-Kennzahlen ändern sich selten sekundengenau -> kurz cachen
+DASHBOARD_STATS_TTL = 30  # Sekunden
+_dashboard_stats_cache = {'expires': 0.0, 'stats': None}
+
+
+def _today_start():
+    """
+    Tagesbeginn (UTC) als SQL-Ausdruck: konstanter SQL-Text, Auswertung in der DB.
+    created_at speichert naive UTC-Zeit, daher auch in PostgreSQL in UTC
+    abschneiden statt in der Zeitzone der DB-Session.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return db.func.datetime('now', 'start of day')
+    return db.func.date_trunc('day', db.func.timezone('UTC', db.func.now()))
+
+
+def _dashboard_stats() -> dict:
+    """Dashboard-Statistiken, pro Worker-Prozess für DASHBOARD_STATS_TTL gecacht."""
+    now = time.monotonic()
+    if _dashboard_stats_cache['stats'] is not None and now < _dashboard_stats_cache['expires']:
+        return _dashboard_stats_cache['stats']
+
+    # Ein Roundtrip über skalare Subqueries
+    today = _today_start()
+    row = db.session.execute(db.select(
+        db.select(db.func.count(VoiceAgent.id))
+        .scalar_subquery().label('total_agents'),
+        db.select(db.func.count(VoiceAgent.id))
+        .where(VoiceAgent.is_active.is_(True))
+        .scalar_subquery().label('active_agents'),
+        db.select(db.func.count(CallSession.id))
+        .scalar_subquery().label('total_calls'),
+        db.select(db.func.count(CallSession.id))
+        .where(CallSession.created_at >= today)
+        .scalar_subquery().label('calls_today'),
+        db.select(db.func.avg(CallSession.duration_seconds))
+        .scalar_subquery().label('avg_duration'),
+        db.select(db.func.count(CallQueue.id))
+        .where(CallQueue.status == 'pending')
+        .scalar_subquery().label('queue_pending')
+    )).one()
+
+    stats = {
+        'total_agents': row.total_agents,
+        'active_agents': row.active_agents,
+        'total_calls': row.total_calls,
+        'calls_today': row.calls_today,
+        'avg_duration': row.avg_duration or 0,
+        'queue_pending': row.queue_pending
+    }
+
+    _dashboard_stats_cache['stats'] = stats
+    _dashboard_stats_cache['expires'] = now + DASHBOARD_STATS_TTL
+    return stats
+
+
 @voice_ai_bp.route('/')
 def dashboard():
     """Voice AI Dashboard."""
     agents = VoiceAgent.query.filter_by(is_active=True).all()
 
-    # Statistiken
-    stats = {
-        'total_agents': VoiceAgent.query.count(),
-        'active_agents': VoiceAgent.query.filter_by(is_active=True).count(),
-        'total_calls': CallSession.query.count(),
-        'calls_today': CallSession.query.filter(
-            CallSession.created_at >= datetime.now(timezone.utc).replace(hour=0, minute=0, second=0)
-        ).count(),
-        'avg_duration': db.session.query(db.func.avg(CallSession.duration_seconds)).scalar() or 0,
-        'queue_pending': CallQueue.query.filter_by(status='pending').count()
-    }
+    stats = _dashboard_stats()
 
-    recent_calls = CallSession.query.order_by(
+    recent_calls = CallSession.query.options(
+        load_only(*_CALL_LIST_COLUMNS),
+        selectinload(CallSession.agent),
+        selectinload(CallSession.customer)
+    ).order_by(
         CallSession.created_at.desc()
     ).limit(10).all()
 
@@ -191,18 +265,29 @@ def agent_detail(id):
     """Agent Details und Statistiken."""
     agent = VoiceAgent.query.get_or_404(id)
 
+    # Alle Kennzahlen in einer Aggregat-Query
+    row = db.session.query(
+        db.func.count(CallSession.id).label('total'),
+        db.func.coalesce(db.func.avg(CallSession.duration_seconds), 0).label('avg_duration'),
+        db.func.coalesce(db.func.sum(
+            db.case((CallSession.sentiment == 'positive', 1), else_=0)
+        ), 0).label('positive'),
+        db.func.coalesce(db.func.sum(
+            db.case((CallSession.outcome == 'appointment', 1), else_=0)
+        ), 0).label('appointments')
+    ).filter(CallSession.agent_id == id).one()
+
     stats = {
-        'total_calls': agent.call_sessions.count(),
-        'avg_duration': db.session.query(
-            db.func.avg(CallSession.duration_seconds)
-        ).filter(CallSession.agent_id == id).scalar() or 0,
-        'positive_calls': agent.call_sessions.filter_by(sentiment='positive').count(),
-        'appointments': agent.call_sessions.filter(
-            CallSession.outcome == 'appointment'
-        ).count()
+        'total_calls': row.total,
+        'avg_duration': row.avg_duration,
+        'positive_calls': row.positive,
+        'appointments': row.appointments
     }
 
-    recent_calls = agent.call_sessions.order_by(
+    recent_calls = agent.call_sessions.options(
+        load_only(*_CALL_LIST_COLUMNS),
+        selectinload(CallSession.customer)
+    ).order_by(
         CallSession.created_at.desc()
     ).limit(20).all()
 
@@ -232,41 +317,73 @@ def agent_edit(id):
 
 @voice_ai_bp.route('/calls')
 def call_list():
-    """Liste aller Anrufe."""
-    page = request.args.get('page', 1, type=int)
+    """Liste aller Anrufe (Keyset-Pagination über created_at/id)."""
+    per_page = 20
     status = request.args.get('status', '')
+    before = request.args.get('before', '')
+    before_id = request.args.get('before_id', type=int)
 
-    query = CallSession.query
+    query = CallSession.query.options(
+        load_only(*_CALL_LIST_COLUMNS),
+        selectinload(CallSession.agent),
+        selectinload(CallSession.customer)
+    )
 
     if status:
         query = query.filter_by(status=status)
 
-    pagination = query.order_by(
-        CallSession.created_at.desc()
-    ).paginate(page=page, per_page=20, error_out=False)
+    if before and before_id is not None:
+        try:
+            before_ts = datetime.fromisoformat(before)
+        except ValueError:
+            before_ts = None
+        if before_ts is not None:
+            query = query.filter(
+                db.tuple_(CallSession.created_at, CallSession.id) < (before_ts, before_id)
+            )
+
+    calls = query.order_by(
+        CallSession.created_at.desc(),
+        CallSession.id.desc()
+    ).limit(per_page + 1).all()
+
+    has_next = len(calls) > per_page
+    calls = calls[:per_page]
+    next_cursor = (calls[-1].created_at.isoformat(), calls[-1].id) if has_next else None
 
     return render_template('voice_ai/calls.html',
-                          calls=pagination.items,
-                          pagination=pagination,
+                          calls=calls,
+                          next_cursor=next_cursor,
+                          is_first_page=not before,
                           status=status)
 
 
 @voice_ai_bp.route('/calls/<int:id>')
 def call_detail(id):
     """Call Details mit Transkript."""
-    call = CallSession.query.get_or_404(id)
+    call = CallSession.query.options(
+        undefer(CallSession.transcript),
+        joinedload(CallSession.agent)
+    ).get_or_404(id)
     return render_template('voice_ai/call_detail.html', call=call)
 
 
 @voice_ai_bp.route('/queue')
 def queue_list():
     """Call Queue anzeigen."""
-    pending = CallQueue.query.filter_by(status='pending').order_by(
+    # Kunde und Agent per JOIN laden; weitere Lazy-Loads schlagen fehl (N+1)
+    eager = (
+        joinedload(CallQueue.customer),
+        joinedload(CallQueue.agent),
+        raiseload('*')
+    )
+
+    pending = CallQueue.query.options(*eager).filter_by(status='pending').order_by(
         CallQueue.priority.asc(),
         CallQueue.created_at.asc()
     ).all()
 
-    scheduled = CallQueue.query.filter_by(status='scheduled').order_by(
+    scheduled = CallQueue.query.options(*eager).filter_by(status='scheduled').order_by(
         CallQueue.scheduled_for.asc()
     ).all()
 
@@ -338,17 +455,43 @@ def api_agent_detail(id):
 def api_calls():
     """API: Liste der Anrufe."""
     limit = request.args.get('limit', 50, type=int)
-    calls = CallSession.query.order_by(
+    calls = CallSession.query.options(
+        load_only(*_CALL_LIST_COLUMNS)
+    ).order_by(
         CallSession.created_at.desc()
     ).limit(limit).all()
-    return jsonify([c.to_dict() for c in calls])
+    return jsonify([c.to_summary_dict() for c in calls])
+
+
+# Zeilen pro Server-Side-Cursor-Batch beim Export
+CALL_EXPORT_BATCH_SIZE = 1000
+
+
+@voice_api_bp.route('/calls/export', methods=['GET'])
+@require_api_key
+def api_calls_export():
+    """API: Alle Anrufe als NDJSON-Stream (eine Zeile pro Call)."""
+    status = request.args.get('status')
+
+    stmt = db.select(CallSession).options(
+        undefer(CallSession.transcript)
+    ).order_by(CallSession.id).execution_options(yield_per=CALL_EXPORT_BATCH_SIZE)
+    if status:
+        stmt = stmt.where(CallSession.status == status)
+
+    def generate():
+        # yield_per: Server-Side-Cursor, Speicher bleibt O(Batch-Größe)
+        for call in db.session.execute(stmt).scalars():
+            yield fast_json.dumps_bytes(call.to_dict()) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @voice_api_bp.route('/calls/<int:id>', methods=['GET'])
 @require_api_key
 def api_call_detail(id):
     """API: Call Details."""
-    call = CallSession.query.get_or_404(id)
+    call = CallSession.query.options(undefer(CallSession.transcript)).get_or_404(id)
     return jsonify(call.to_dict())
 
 
@@ -382,7 +525,10 @@ def api_start_call():
 @require_api_key
 def api_queue():
     """API: Queue abrufen."""
-    pending = CallQueue.query.filter_by(status='pending').order_by(
+    pending = CallQueue.query.options(
+        joinedload(CallQueue.customer),
+        raiseload('*')
+    ).filter_by(status='pending').order_by(
         CallQueue.priority.asc()
     ).all()
     return jsonify([q.to_dict() for q in pending])
@@ -417,6 +563,43 @@ def api_add_to_queue():
         return jsonify({'error': str(e)}), 400
 
 
+@voice_api_bp.route('/queue/bulk', methods=['POST'])
+@require_api_key
+def api_add_to_queue_bulk():
+    """API: Viele Kunden auf einmal zur Queue hinzufügen."""
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    agent_id = data.get('agent_id')
+    customer_ids = data.get('customer_ids')
+
+    if not agent_id or not customer_ids or not isinstance(customer_ids, list):
+        return jsonify({'error': 'agent_id and customer_ids required'}), 400
+
+    scheduled_for = data.get('scheduled_for')
+    if scheduled_for:
+        try:
+            scheduled_for = datetime.fromisoformat(scheduled_for)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'scheduled_for must be an ISO timestamp'}), 400
+
+    service = VoiceAIService(db.session)
+
+    try:
+        count = service.add_to_queue_bulk(
+            agent_id,
+            customer_ids,
+            priority=data.get('priority', 5),
+            scheduled_for=scheduled_for
+        )
+        return jsonify({'status': 'ok', 'queued': count}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+
 @voice_api_bp.route('/customers/<int:id>/lead-score', methods=['GET'])
 @require_api_key
 def api_lead_score(id):
@@ -431,58 +614,74 @@ def api_lead_score(id):
 # WEBHOOK ROUTES
 # =============================================================================
 
-@voice_api_bp.route('/webhooks/vapi', methods=['POST'])
-def webhook_vapi():
-    """Webhook für Vapi.ai."""
-    signature = request.headers.get('X-Vapi-Signature', '')
-
-    if not verify_webhook_signature('vapi', request.data, signature):
-        return jsonify({'error': 'Invalid signature'}), 401
+@voice_api_bp.route('/webhooks/<provider>', methods=['POST'])
+def webhook(provider):
+    """Webhook für Vapi.ai, Retell.ai und Bland.ai."""
+    if provider not in WEBHOOK_PROVIDERS:
+        return jsonify({'error': 'Unknown provider'}), 404
 
-    payload = request.get_json()
-    service = VoiceAIService(db.session)
+    raw = request.get_data(cache=False)
+    if not raw:
+        return jsonify({'error': 'Empty payload'}), 400
 
-    try:
-        session = service.handle_webhook('vapi', payload)
-        return jsonify({'status': 'ok', 'call_id': session.id}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    handler = get_provider(provider, '')
+    signature = request.headers.get(handler.SIGNATURE_HEADER, '')
 
+    if not handler.verify_signature(raw, signature):
+        return jsonify({'error': 'Invalid signature'}), 401
 
-@voice_api_bp.route('/webhooks/retell', methods=['POST'])
-def webhook_retell():
-    """Webhook für Retell.ai."""
-    signature = request.headers.get('X-Retell-Signature', '')
+    try:
+        payload = fast_json.loads(raw)
+    except fast_json.JSONDecodeError:
+        return jsonify({'error': 'Invalid JSON'}), 400
 
-    if not verify_webhook_signature('retell', request.data, signature):
-        return jsonify({'error': 'Invalid signature'}), 401
+    # Alle Provider senden ein JSON-Objekt; alles andere würde der Worker nie verarbeiten
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Invalid JSON'}), 400
 
-    payload = request.get_json()
-    service = VoiceAIService(db.session)
+    # Nur speichern; Verarbeitung übernimmt der Worker (flask voice-ai process-webhooks)
+    event_id = VoiceAIService(db.session).enqueue_webhook(provider, payload)
+    return jsonify({'status': 'accepted', 'event_id': event_id}), 202
 
-    try:
-        session = service.handle_webhook('retell', payload)
-        return jsonify({'status': 'ok', 'call_id': session.id}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
+# =============================================================================
+# CLI: WEBHOOK WORKER & QUEUE
+# =============================================================================
 
-@voice_api_bp.route('/webhooks/bland', methods=['POST'])
-def webhook_bland():
-    """Webhook für Bland.ai."""
-    signature = request.headers.get('X-Bland-Signature', '')
+voice_ai_cli = AppGroup('voice-ai', help='Voice AI Befehle.')
 
-    if not verify_webhook_signature('bland', request.data, signature):
-        return jsonify({'error': 'Invalid signature'}), 401
 
-    payload = request.get_json()
+@voice_ai_cli.command('process-webhooks')
+@click.option('--batch-size', default=100, show_default=True,
+              help='Events pro Durchlauf.')
+@click.option('--interval', default=1.0, show_default=True,
+              help='Pause in Sekunden, wenn die Warteschlange abgearbeitet ist.')
+@click.option('--once', is_flag=True, help='Nur einen Durchlauf ausführen.')
+def process_webhooks_command(batch_size, interval, once):
+    """Verarbeitet gespeicherte Provider-Webhooks."""
     service = VoiceAIService(db.session)
-
-    try:
-        session = service.handle_webhook('bland', payload)
-        return jsonify({'status': 'ok', 'call_id': session.id}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    while True:
+        processed = service.process_webhook_events(limit=batch_size)
+        if processed:
+            click.echo(f'{processed} Webhook-Events verarbeitet')
+        if once:
+            break
+        if processed < batch_size:
+            time.sleep(interval)
+
+
+@voice_ai_cli.command('drain-queue')
+@click.option('--agent-id', type=int, default=None, help='Nur Queue dieses Agents.')
+@click.option('--concurrency', default=20, show_default=True,
+              help='Maximale Anzahl gleichzeitiger Provider-Requests.')
+@click.option('--limit', default=100, show_default=True,
+              help='Maximale Anzahl Anrufe pro Durchlauf.')
+def drain_queue_command(agent_id, concurrency, limit):
+    """Startet fällige Anrufe aus der Call-Queue parallel."""
+    started = VoiceAIService(db.session).drain_queue(
+        agent_id=agent_id, max_concurrency=concurrency, limit=limit
+    )
+    click.echo(f'{started} Anrufe gestartet')
 
 
 # =============================================================================
@@ -494,6 +693,8 @@ def register_voice_ai(app):
     app.register_blueprint(voice_ai_bp)
     app.register_blueprint(voice_api_bp)
 
+    app.cli.add_command(voice_ai_cli)
+
     # Tabellen erstellen
     with app.app_context():
         db.create_all()
@@ -4,19 +4,34 @@ Multi-Provider Unterstützung: Vapi.ai, Retell.ai, Bland.ai
 Sprachen: Deutsch, Bosnisch, Serbisch
 """
 
+import atexit
+import hmac
+import importlib
 import os
-import json
+import sys
+import threading
+import time
 import requests
-from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import bindparam, case, func, insert, or_, select, true, update
+from sqlalchemy.orm import joinedload
 from typing import Optional, Dict, Any, List
 from abc import ABC, abstractmethod
+from functools import lru_cache
+
+import fast_json
 
 
 # =============================================================================
 # SYSTEM PROMPTS FÜR SALES AGENT (Multilingual)
 # =============================================================================
 
-SYSTEM_PROMPTS = {
+# Read-only: Prompts werden nur gelesen und in Agent-Datensätze kopiert
+SYSTEM_PROMPTS = MappingProxyType({
     'de': """Du bist ein freundlicher Verkaufsberater. Sprich natürlich wie ein Mensch.
 
 WICHTIG - Klinge menschlich:
@@ -82,7 +97,116 @@ TVOJ CILJ:
 3. Представи одговарајуће решење
 4. Обради приговоре с разумевањем
 5. Заврши са јасним следећим кораком"""
-}
+})
+
+
+# =============================================================================
+# WEBHOOK-HILFEN
+# =============================================================================
+
+# Maximale Länge der Transkript-Vorschau in Interactions
+TRANSCRIPT_PREVIEW_LENGTH = 500
+
+# Event-Typen, die ein Gesprächsende melden (Vapi, Retell, Bland)
+_END_EVENTS = frozenset({'end-of-call-report', 'call_ended', 'completed'})
+
+# Lead-Score-Änderung je Gesprächsstimmung
+_SENTIMENT_SCORES = MappingProxyType({'positive': 20, 'neutral': 0, 'negative': -20})
+
+# Geteilter, nie veränderter Platzhalter für fehlende Unterobjekte in Payloads
+_EMPTY = MappingProxyType({})
+
+
+if sys.version_info >= (3, 11):
+    # Ab 3.11 versteht fromisoformat das 'Z'-Suffix direkt (C-Implementierung)
+    _parse_iso = datetime.fromisoformat
+else:
+    def _parse_iso(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _parse_timestamp(value) -> datetime:
+    """ISO-String oder Epoch-Millisekunden (Retell) -> datetime."""
+    if isinstance(value, str):
+        return _parse_iso(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    return value
+
+
+# =============================================================================
+# HTTP CLIENT
+# =============================================================================
+
+# Timeout (connect, read) für Provider-Requests
+PROVIDER_TIMEOUT = (3.05, 10)
+
+_http_session = None
+
+
+def _get_http_session() -> requests.Session:
+    """
+    Gemeinsame requests.Session für alle Provider (lazy).
+    Hält Keep-Alive-Verbindungen pro Host offen, damit nicht jeder
+    Provider-Aufruf einen neuen TCP+TLS-Handshake braucht.
+
+    Retries: Verbindungsfehler immer (Request wurde nie gesendet),
+    Server-Fehler nur bei GET - ein wiederholtes POST könnte z.B.
+    einen Anruf doppelt auslösen. Rate-Limits (429) behandelt
+    VoiceAIProvider._request mit eigenem Backoff.
+    """
+    global _http_session
+    if _http_session is None:
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[500, 502, 503, 504],
+                              allowed_methods=frozenset({'GET'}))
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        atexit.register(session.close)
+        _http_session = session
+    return _http_session
+
+
+class _TokenBucket:
+    """Thread-sicherer Token-Bucket: begrenzt Requests auf `rate` pro Sekunde."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blockiert, bis ein Token verfügbar ist."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Obergrenze für die prozessweiten Caches (Rate-Limiter, Provider-Instanzen);
+# rotierte Keys und gelöschte Agents fallen per LRU wieder heraus
+PROVIDER_CACHE_SIZE = 128
+
+_rate_limiters_lock = threading.Lock()
+
+
+@lru_cache(maxsize=PROVIDER_CACHE_SIZE)
+def _rate_limiter(provider: str, api_key: str, rps: float) -> _TokenBucket:
+    """Ein Bucket pro (Provider, API-Key), geteilt über alle Instanzen/Threads."""
+    return _TokenBucket(rps)
 
 
 # =============================================================================
@@ -92,9 +216,103 @@ TVOJ CILJ:
 class VoiceAIProvider(ABC):
     """Abstract Base Class für Voice AI Provider."""
 
+    __slots__ = ('api_key', 'config', '_session', '_limiter', '_cached_headers')
+
+    BASE_URL = ""
+
+    # Webhook-Signatur: Header und Env-Variable mit dem HMAC-Secret
+    SIGNATURE_HEADER = ""
+    WEBHOOK_SECRET_ENV = ""
+    _webhook_secret = b""
+
+    # Requests pro Sekunde (überschreibbar per config['rps'])
+    DEFAULT_RPS = 10
+    # Versuche bei Rate-Limit-Antworten; Backoff 0.5s, 1s, 2s ... max. 8s
+    MAX_ATTEMPTS = 3
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 8.0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.WEBHOOK_SECRET_ENV:
+            # Secret einmalig beim Laden lesen und kodieren
+            cls._webhook_secret = os.environ.get(cls.WEBHOOK_SECRET_ENV, '').encode()
+
     def __init__(self, api_key: str, config: Dict[str, Any] = None):
         self.api_key = api_key
         self.config = config or {}
+        # Pool modulweit teilen (auch Instanzen außerhalb von get_provider)
+        self._session = _get_http_session()
+        self._limiter = self._get_rate_limiter()
+        self._cached_headers = self._build_headers()
+
+    @abstractmethod
+    def _build_headers(self) -> Dict[str, str]:
+        """Auth-Header des Providers (einmal pro Instanz gebaut)."""
+        pass
+
+    def _headers(self) -> Dict[str, str]:
+        return self._cached_headers
+
+    def verify_signature(self, raw_body: bytes, signature: str) -> bool:
+        """
+        Verifiziert die Webhook-Signatur (HMAC-SHA256, hex-kodiert).
+        Ohne konfiguriertes Secret wird nicht verifiziert.
+        """
+        secret = self._webhook_secret
+        if not secret:
+            return True
+
+        try:
+            received = bytes.fromhex(signature)
+        except ValueError:
+            return False
+
+        # hmac.digest: One-Shot über OpenSSL, ohne HMAC-Objekt
+        expected = hmac.digest(secret, raw_body, 'sha256')
+        if len(received) != len(expected):
+            return False
+        return hmac.compare_digest(received, expected)
+
+    def warmup(self):
+        """Baut vorab eine Verbindung (TCP+TLS) zum Provider im Pool auf."""
+        try:
+            self._session.head(self.BASE_URL, timeout=2)
+        except requests.RequestException:
+            pass
+
+    def _get_rate_limiter(self) -> _TokenBucket:
+        # Lock: parallele Misses dürfen keinen zweiten Bucket anlegen
+        with _rate_limiters_lock:
+            return _rate_limiter(type(self).__name__, self.api_key,
+                                 self.config.get('rps', self.DEFAULT_RPS))
+
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        return response.status_code == 429 or 'rate limit' in response.text.lower()
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        HTTP-Request über den gemeinsamen Pool mit Rate-Limit und Backoff.
+        Bei 429/Rate-Limit wird exponentiell gewartet (Retry-After wird
+        respektiert); die letzte Antwort wird unverändert zurückgegeben.
+        """
+        kwargs.setdefault('timeout', PROVIDER_TIMEOUT)
+        if 'json' in kwargs:
+            # Einmal mit orjson serialisieren; Content-Type steht in _headers()
+            kwargs['data'] = fast_json.dumps_bytes(kwargs.pop('json'), option=0)
+        for attempt in range(self.MAX_ATTEMPTS):
+            self._limiter.acquire()
+            response = self._session.request(method, url, **kwargs)
+            if response.ok or attempt == self.MAX_ATTEMPTS - 1 \
+                    or not self._is_rate_limited(response):
+                return response
+
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() \
+                else self.BACKOFF_BASE * 2 ** attempt
+            time.sleep(min(delay, self.BACKOFF_MAX))
+        return response
 
     @abstractmethod
     def create_agent(self, name: str, system_prompt: str, voice_config: Dict) -> Dict:
@@ -113,9 +331,37 @@ class VoiceAIProvider(ABC):
         pass
 
     @abstractmethod
-    def parse_webhook(self, payload: Dict) -> Dict:
-        """Parsed Webhook-Daten vom Provider."""
-        pass
+    def webhook_call_id(self, payload: Dict) -> Optional[str]:
+        """Provider-Call-ID aus dem Webhook-Payload."""
+
+    @abstractmethod
+    def apply_webhook(self, session, payload: Dict) -> str:
+        """
+        Überträgt die Webhook-Daten direkt auf die CallSession und gibt
+        den Event-Typ zurück.
+        """
+
+    @staticmethod
+    def _write_session(session, status=None, ended_at=None, duration_seconds=None,
+                       transcript=None, summary=None, recording_url=None,
+                       cost=None, sentiment=None):
+        """Schreibt gesetzte Webhook-Werte auf die CallSession."""
+        if status:
+            session.status = status
+        if ended_at:
+            session.ended_at = _parse_timestamp(ended_at)
+        if duration_seconds:
+            session.duration_seconds = duration_seconds
+        if transcript:
+            session.transcript = transcript
+        if summary:
+            session.summary = summary
+        if recording_url:
+            session.recording_url = recording_url
+        if cost:
+            session.cost_amount = float(cost)
+        if sentiment:
+            session.sentiment = sentiment
 
 
 # =============================================================================
@@ -125,9 +371,13 @@ class VoiceAIProvider(ABC):
 class VapiProvider(VoiceAIProvider):
     """Vapi.ai Integration."""
 
+    __slots__ = ()
+
     BASE_URL = "https://api.vapi.ai"
+    SIGNATURE_HEADER = "X-Vapi-Signature"
+    WEBHOOK_SECRET_ENV = "VAPI_WEBHOOK_SECRET"
 
-    def _headers(self):
+    def _build_headers(self) -> Dict[str, str]:
         return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -160,13 +410,13 @@ class VapiProvider(VoiceAIProvider):
             "hipaaEnabled": False
         }
 
-        response = requests.post(
-            f"{self.BASE_URL}/assistant",
+        response = self._request(
+            'POST', f"{self.BASE_URL}/assistant",
             headers=self._headers(),
             json=payload
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
     def start_outbound_call(self, agent_id: str, phone_number: str,
                            customer_data: Dict) -> Dict:
@@ -187,59 +437,52 @@ class VapiProvider(VoiceAIProvider):
             }
         }
 
-        response = requests.post(
-            f"{self.BASE_URL}/call/phone",
+        response = self._request(
+            'POST', f"{self.BASE_URL}/call/phone",
             headers=self._headers(),
             json=payload
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
     def get_call_status(self, call_id: str) -> Dict:
         """Holt Call-Details von Vapi."""
-        response = requests.get(
-            f"{self.BASE_URL}/call/{call_id}",
+        response = self._request(
+            'GET', f"{self.BASE_URL}/call/{call_id}",
             headers=self._headers()
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
-    def parse_webhook(self, payload: Dict) -> Dict:
-        """Parsed Vapi Webhook."""
-        message = payload.get('message', {})
-        call = message.get('call', {})
+    def webhook_call_id(self, payload: Dict) -> Optional[str]:
+        message = payload.get('message') or _EMPTY
+        return (message.get('call') or _EMPTY).get('id')
 
+    def apply_webhook(self, session, payload: Dict) -> str:
+        """Schreibt Vapi Webhook auf die Session."""
+        message = payload.get('message') or _EMPTY
+        call = message.get('call') or _EMPTY
         event_type = message.get('type', '')
-
-        result = {
-            'provider': 'vapi',
-            'event_type': event_type,
-            'call_id': call.get('id'),
-            'status': call.get('status'),
-            'phone_from': call.get('customer', {}).get('number'),
-            'phone_to': call.get('phoneNumber', {}).get('number'),
-            'started_at': call.get('startedAt'),
-            'ended_at': call.get('endedAt'),
-            'duration_seconds': None,
-            'transcript': None,
-            'recording_url': None,
-            'cost': None
-        }
-
-        # End of call
-        if event_type == 'end-of-call-report':
-            result['transcript'] = message.get('transcript', '')
-            result['summary'] = message.get('summary', '')
-            result['recording_url'] = message.get('recordingUrl')
-            result['cost'] = message.get('cost')
-
-            # Berechne Dauer
-            if call.get('startedAt') and call.get('endedAt'):
-                start = datetime.fromisoformat(call['startedAt'].replace('Z', '+00:00'))
-                end = datetime.fromisoformat(call['endedAt'].replace('Z', '+00:00'))
-                result['duration_seconds'] = int((end - start).total_seconds())
-
-        return result
+        ended_at = call.get('endedAt')
+
+        if event_type != 'end-of-call-report':
+            self._write_session(session, call.get('status'), ended_at)
+            return event_type
+
+        # Berechne Dauer
+        duration = None
+        started_at = call.get('startedAt')
+        if started_at and ended_at:
+            duration = int((_parse_iso(ended_at) - _parse_iso(started_at)).total_seconds())
+
+        self._write_session(
+            session, call.get('status'), ended_at, duration,
+            transcript=message.get('transcript'),
+            summary=message.get('summary'),
+            recording_url=message.get('recordingUrl'),
+            cost=message.get('cost'),
+        )
+        return event_type
 
 
 # =============================================================================
@@ -249,9 +492,13 @@ class VapiProvider(VoiceAIProvider):
 class RetellProvider(VoiceAIProvider):
     """Retell.ai Integration."""
 
+    __slots__ = ()
+
     BASE_URL = "https://api.retellai.com"
+    SIGNATURE_HEADER = "X-Retell-Signature"
+    WEBHOOK_SECRET_ENV = "RETELL_WEBHOOK_SECRET"
 
-    def _headers(self):
+    def _build_headers(self) -> Dict[str, str]:
         return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -267,13 +514,13 @@ class RetellProvider(VoiceAIProvider):
             "general_tools": []
         }
 
-        llm_response = requests.post(
-            f"{self.BASE_URL}/create-retell-llm",
+        llm_response = self._request(
+            'POST', f"{self.BASE_URL}/create-retell-llm",
             headers=self._headers(),
             json=llm_payload
         )
         llm_response.raise_for_status()
-        llm_id = llm_response.json().get('llm_id')
+        llm_id = fast_json.loads(llm_response.content).get('llm_id')
 
         # Dann Agent erstellen
         agent_payload = {
@@ -288,13 +535,13 @@ class RetellProvider(VoiceAIProvider):
             "responsiveness": 0.8
         }
 
-        response = requests.post(
-            f"{self.BASE_URL}/create-agent",
+        response = self._request(
+            'POST', f"{self.BASE_URL}/create-agent",
             headers=self._headers(),
             json=agent_payload
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
     def start_outbound_call(self, agent_id: str, phone_number: str,
                            customer_data: Dict) -> Dict:
@@ -309,53 +556,46 @@ class RetellProvider(VoiceAIProvider):
             }
         }
 
-        response = requests.post(
-            f"{self.BASE_URL}/create-phone-call",
+        response = self._request(
+            'POST', f"{self.BASE_URL}/create-phone-call",
             headers=self._headers(),
             json=payload
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
     def get_call_status(self, call_id: str) -> Dict:
         """Holt Call-Details von Retell."""
-        response = requests.get(
-            f"{self.BASE_URL}/get-call/{call_id}",
+        response = self._request(
+            'GET', f"{self.BASE_URL}/get-call/{call_id}",
             headers=self._headers()
         )
         response.raise_for_status()
-        return response.json()
-
-    def parse_webhook(self, payload: Dict) -> Dict:
-        """Parsed Retell Webhook."""
-        event = payload.get('event', '')
-        call = payload.get('call', {})
-
-        result = {
-            'provider': 'retell',
-            'event_type': event,
-            'call_id': call.get('call_id'),
-            'status': call.get('call_status'),
-            'phone_from': call.get('from_number'),
-            'phone_to': call.get('to_number'),
-            'started_at': call.get('start_timestamp'),
-            'ended_at': call.get('end_timestamp'),
-            'duration_seconds': None,
-            'transcript': None,
-            'recording_url': None,
-            'cost': None
-        }
-
-        if event == 'call_ended':
-            result['transcript'] = call.get('transcript', '')
-            result['recording_url'] = call.get('recording_url')
-            result['duration_seconds'] = call.get('duration_ms', 0) // 1000
-
-            # Analyse
-            result['sentiment'] = call.get('call_analysis', {}).get('user_sentiment')
-            result['summary'] = call.get('call_analysis', {}).get('call_summary')
-
-        return result
+        return fast_json.loads(response.content)
+
+    def webhook_call_id(self, payload: Dict) -> Optional[str]:
+        return (payload.get('call') or _EMPTY).get('call_id')
+
+    def apply_webhook(self, session, payload: Dict) -> str:
+        """Schreibt Retell Webhook auf die Session."""
+        call = payload.get('call') or _EMPTY
+        event_type = payload.get('event', '')
+
+        if event_type != 'call_ended':
+            self._write_session(session, call.get('call_status'), call.get('end_timestamp'))
+            return event_type
+
+        # Analyse
+        analysis = call.get('call_analysis') or _EMPTY
+        self._write_session(
+            session, call.get('call_status'), call.get('end_timestamp'),
+            (call.get('duration_ms') or 0) // 1000,
+            transcript=call.get('transcript'),
+            summary=analysis.get('call_summary'),
+            recording_url=call.get('recording_url'),
+            sentiment=analysis.get('user_sentiment'),
+        )
+        return event_type
 
 
 # =============================================================================
@@ -365,9 +605,13 @@ class RetellProvider(VoiceAIProvider):
 class BlandProvider(VoiceAIProvider):
     """Bland.ai Integration."""
 
+    __slots__ = ()
+
     BASE_URL = "https://api.bland.ai/v1"
+    SIGNATURE_HEADER = "X-Bland-Signature"
+    WEBHOOK_SECRET_ENV = "BLAND_WEBHOOK_SECRET"
 
-    def _headers(self):
+    def _build_headers(self) -> Dict[str, str]:
         return {
             "authorization": self.api_key,
             "Content-Type": "application/json"
@@ -387,7 +631,7 @@ class BlandProvider(VoiceAIProvider):
                            customer_data: Dict) -> Dict:
         """Startet Outbound Call über Bland."""
         # agent_id ist hier die gespeicherte Config
-        agent_config = json.loads(agent_id) if isinstance(agent_id, str) else agent_id
+        agent_config = fast_json.loads(agent_id) if isinstance(agent_id, str) else agent_id
 
         payload = {
             "phone_number": phone_number,
@@ -406,73 +650,123 @@ class BlandProvider(VoiceAIProvider):
             }
         }
 
-        response = requests.post(
-            f"{self.BASE_URL}/calls",
+        response = self._request(
+            'POST', f"{self.BASE_URL}/calls",
             headers=self._headers(),
             json=payload
         )
         response.raise_for_status()
-        return response.json()
+        return fast_json.loads(response.content)
 
     def get_call_status(self, call_id: str) -> Dict:
         """Holt Call-Details von Bland."""
-        response = requests.get(
-            f"{self.BASE_URL}/calls/{call_id}",
+        response = self._request(
+            'GET', f"{self.BASE_URL}/calls/{call_id}",
             headers=self._headers()
         )
         response.raise_for_status()
-        return response.json()
-
-    def parse_webhook(self, payload: Dict) -> Dict:
-        """Parsed Bland Webhook."""
-        result = {
-            'provider': 'bland',
-            'event_type': payload.get('status', 'unknown'),
-            'call_id': payload.get('call_id'),
-            'status': payload.get('status'),
-            'phone_from': payload.get('from'),
-            'phone_to': payload.get('to'),
-            'started_at': payload.get('started_at'),
-            'ended_at': payload.get('ended_at'),
-            'duration_seconds': payload.get('call_length'),
-            'transcript': None,
-            'recording_url': None,
-            'cost': payload.get('price')
-        }
-
-        if payload.get('status') == 'completed':
-            # Hole volles Transkript
-            result['transcript'] = payload.get('concatenated_transcript', '')
-            result['recording_url'] = payload.get('recording_url')
-            result['summary'] = payload.get('summary')
-            result['sentiment'] = payload.get('analysis', {}).get('sentiment')
-
-        return result
+        return fast_json.loads(response.content)
+
+    def webhook_call_id(self, payload: Dict) -> Optional[str]:
+        return payload.get('call_id')
+
+    def apply_webhook(self, session, payload: Dict) -> str:
+        """Schreibt Bland Webhook auf die Session."""
+        get = payload.get
+        status = get('status')
+
+        if status != 'completed':
+            self._write_session(session, status, get('ended_at'), get('call_length'),
+                                cost=get('price'))
+            return get('status', 'unknown')
+
+        # Volles Transkript
+        self._write_session(
+            session, status, get('ended_at'), get('call_length'),
+            transcript=get('concatenated_transcript'),
+            summary=get('summary'),
+            recording_url=get('recording_url'),
+            cost=get('price'),
+            sentiment=(get('analysis') or _EMPTY).get('sentiment'),
+        )
+        return status
 
 
 # =============================================================================
 # PROVIDER FACTORY
 # =============================================================================
 
+_PROVIDER_CLASSES = {
+    'vapi': VapiProvider,
+    'retell': RetellProvider,
+    'bland': BlandProvider
+}
+
+# Provider-Namen für Webhook-Routen
+WEBHOOK_PROVIDERS = frozenset(_PROVIDER_CLASSES)
+
+@lru_cache(maxsize=PROVIDER_CACHE_SIZE)
+def _cached_provider(name: str, api_key: str, config_items: tuple) -> VoiceAIProvider:
+    """Prozessweiter LRU-Cache: (provider, api_key, config) -> Instanz."""
+    return _PROVIDER_CLASSES[name](api_key, dict(config_items))
+
+
 def get_provider(provider_name: str, api_key: str, config: Dict = None) -> VoiceAIProvider:
-    """Factory-Funktion um den richtigen Provider zu erstellen."""
-    providers = {
-        'vapi': VapiProvider,
-        'retell': RetellProvider,
-        'bland': BlandProvider
-    }
-
-    provider_class = providers.get(provider_name.lower())
+    """
+    Factory-Funktion um den richtigen Provider zu erstellen.
+    Instanzen sind zustandslos und werden pro (Name, API-Key, Config)
+    wiederverwendet.
+    """
+    name = provider_name.lower()
+    provider_class = _PROVIDER_CLASSES.get(name)
     if not provider_class:
         raise ValueError(f"Unknown provider: {provider_name}")
 
-    return provider_class(api_key, config)
+    config_items = tuple(sorted((config or {}).items()))
+    try:
+        hash(config_items)
+    except TypeError:
+        # Config mit nicht-hashbaren Werten -> nicht cachen
+        return provider_class(api_key, config)
+    return _cached_provider(name, api_key, config_items)
+
+
+def warmup_providers():
+    """
+    Wärmt den Verbindungs-Pool für alle Provider vor (beim Worker-Start),
+    damit der erste echte Request keinen TCP+TLS-Handshake mehr zahlt.
+    """
+    for name in _PROVIDER_CLASSES:
+        get_provider(name, '').warmup()
 
 
 # =============================================================================
 # VOICE AI SERVICE
 # =============================================================================
 
+# Modell-Klassen -> Modul; Import erst bei Bedarf (vermeidet Zirkelimporte
+# und Mapper-Setup beim Laden dieses Moduls)
+_MODEL_MODULES = {
+    'VoiceAgent': 'voice_ai_models',
+    'CallSession': 'voice_ai_models',
+    'LeadScore': 'voice_ai_models',
+    'CallQueue': 'voice_ai_models',
+    'WebhookEvent': 'voice_ai_models',
+    'Customer': 'models',
+    'Interaction': 'models',
+}
+_models_cache: Dict[str, type] = {}
+
+
+def _m(name: str) -> type:
+    """Lädt eine Modell-Klasse einmalig und cached sie modulweit."""
+    model = _models_cache.get(name)
+    if model is None:
+        module = importlib.import_module(_MODEL_MODULES[name])
+        model = _models_cache[name] = getattr(module, name)
+    return model
+
+
 class VoiceAIService:
     """
     Hauptservice für Voice AI Integration.
@@ -484,7 +778,7 @@ class VoiceAIService:
 
     def create_agent(self, agent_data: Dict) -> 'VoiceAgent':
         """Erstellt einen neuen Voice Agent."""
-        from voice_ai_models import VoiceAgent
+        VoiceAgent = _m('VoiceAgent')
 
         # System Prompt basierend auf Sprache
         language = agent_data.get('primary_language', 'de')
@@ -508,7 +802,7 @@ class VoiceAIService:
         )
 
         if agent_data.get('supported_languages'):
-            agent.set_supported_languages(agent_data['supported_languages'])
+            agent.supported_languages = list(agent_data['supported_languages'])
 
         self.db.add(agent)
         self.db.commit()
@@ -545,14 +839,21 @@ class VoiceAIService:
 
     def start_call(self, agent_id: int, customer_id: int) -> 'CallSession':
         """Startet einen ausgehenden Anruf."""
-        from voice_ai_models import VoiceAgent, CallSession
-        from models import Customer
-
-        agent = VoiceAgent.query.get(agent_id)
-        customer = Customer.query.get(customer_id)
+        VoiceAgent = _m('VoiceAgent')
+        CallSession = _m('CallSession')
+        Customer = _m('Customer')
+
+        # Agent und Kunde in einem Roundtrip (je höchstens eine Zeile;
+        # JOIN ON true statt Komma-Join vermeidet die Kartesisch-Warnung)
+        row = self.db.execute(
+            select(VoiceAgent, Customer)
+            .join(Customer, true())
+            .where(VoiceAgent.id == agent_id, Customer.id == customer_id)
+        ).first()
 
-        if not agent or not customer:
+        if row is None:
             raise ValueError("Agent or Customer not found")
+        agent, customer = row
 
         if not customer.phone:
             raise ValueError("Customer has no phone number")
@@ -572,22 +873,11 @@ class VoiceAIService:
 
         # Anruf beim Provider starten
         try:
-            provider = get_provider(agent.provider, agent.api_key, {
-                'phone_number_id': agent.phone_number,
-                'from_number': agent.phone_number
-            })
-
-            customer_data = {
-                'id': customer.id,
-                'name': customer.name,
-                'company': customer.company,
-                'notes': customer.notes
-            }
-
+            provider = self._call_provider(agent)
             result = provider.start_outbound_call(
                 agent.agent_id,
                 customer.phone,
-                customer_data
+                self._customer_call_data(customer)
             )
 
             session.provider_call_id = result.get('id') or result.get('call_id')
@@ -601,91 +891,181 @@ class VoiceAIService:
 
         return session
 
-    def handle_webhook(self, provider_name: str, payload: Dict) -> 'CallSession':
-        """Verarbeitet eingehende Webhooks."""
-        from voice_ai_models import CallSession, LeadScore
-        from models import Customer, Interaction
+    @staticmethod
+    def _call_provider(agent: 'VoiceAgent') -> VoiceAIProvider:
+        """Provider-Instanz für ausgehende Anrufe eines Agents."""
+        return get_provider(agent.provider, agent.api_key, {
+            'phone_number_id': agent.phone_number,
+            'from_number': agent.phone_number
+        })
+
+    @staticmethod
+    def _customer_call_data(customer: 'Customer') -> Dict:
+        """Kundendaten, die an den Provider übergeben werden."""
+        return {
+            'id': customer.id,
+            'name': customer.name,
+            'company': customer.company,
+            'notes': customer.notes
+        }
+
+    def drain_queue(self, agent_id: int = None, max_concurrency: int = 20,
+                    limit: int = 100) -> int:
+        """
+        Startet bis zu `limit` fällige Anrufe aus der Queue parallel.
+
+        DB-Zugriffe laufen im aufrufenden Thread (Session ist nicht
+        thread-safe); nur die Provider-Requests laufen in einem Thread-Pool
+        mit höchstens max_concurrency gleichzeitigen Anrufen.
+        Gibt die Anzahl erfolgreich gestarteter Anrufe zurück.
+        """
+        CallSession = _m('CallSession')
+        CallQueue = _m('CallQueue')
+
+        query = CallQueue.query.options(
+            joinedload(CallQueue.agent),
+            joinedload(CallQueue.customer)
+        ).filter_by(status='pending')
+
+        if agent_id:
+            query = query.filter_by(agent_id=agent_id)
+
+        # SKIP LOCKED: parallele Drainer übernehmen disjunkte Einträge
+        items = query.order_by(
+            CallQueue.priority.asc(),
+            CallQueue.created_at.asc()
+        ).limit(limit).with_for_update(skip_locked=True, of=CallQueue).all()
+
+        # 1. Call Sessions anlegen und Queue-Einträge übernehmen (ein Commit)
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for item in items:
+            item.attempts = (item.attempts or 0) + 1
+            item.last_attempt_at = now
+
+            if not item.agent or not item.customer or not item.customer.phone:
+                item.status = 'failed'
+                continue
+
+            session = CallSession(
+                agent_id=item.agent.id,
+                customer_id=item.customer.id,
+                direction='outbound',
+                phone_from=item.agent.phone_number,
+                phone_to=item.customer.phone,
+                status='initiated',
+                started_at=now
+            )
+            self.db.add(session)
+            item.call_session = session
+            item.status = 'calling'
+            # Nur einfache Werte an die Threads geben (ORM-Objekte verfallen beim Commit)
+            jobs.append((item, session, self._call_provider(item.agent), item.agent.agent_id,
+                         item.customer.phone, self._customer_call_data(item.customer)))
+        self.db.commit()
+
+        if not jobs:
+            return 0
+
+        # 2. Provider-Requests parallel ausführen
+        def start(job):
+            _, _, provider, provider_agent_id, phone, customer_data = job
+            return provider.start_outbound_call(provider_agent_id, phone, customer_data)
+
+        started = 0
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(jobs))) as pool:
+            futures = {pool.submit(start, job): job for job in jobs}
+            for future in as_completed(futures):
+                item, session = futures[future][:2]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Warning: Could not start call for queue item {item.id}: {e}")
+                    session.status = 'failed'
+                    item.status = 'failed' if item.attempts >= item.max_attempts else 'pending'
+                else:
+                    session.provider_call_id = result.get('id') or result.get('call_id')
+                    session.status = 'ringing'
+                    started += 1
+
+        # 3. Ergebnisse gesammelt schreiben
+        self.db.commit()
+        return started
+
+    def handle_webhook(self, provider_name: str, payload: Dict, commit: bool = True) -> 'CallSession':
+        """
+        Verarbeitet eingehende Webhooks.
+        Mit commit=False bleibt die Transaktion offen, damit der Aufrufer
+        weitere Änderungen (z.B. processed_at) atomar mitschreiben kann.
+        """
+        CallSession = _m('CallSession')
+        Interaction = _m('Interaction')
 
         provider = get_provider(provider_name, "")  # API key not needed for parsing
-        data = provider.parse_webhook(payload)
+        call_id = provider.webhook_call_id(payload)
 
         # Session finden
         session = CallSession.query.filter_by(
-            provider_call_id=data['call_id']
+            provider_call_id=call_id
         ).first()
 
         if not session:
             # Neuer Inbound Call?
             session = CallSession(
-                provider_call_id=data['call_id'],
-                direction='inbound',
-                status=data['status']
+                provider_call_id=call_id,
+                direction='inbound'
             )
             self.db.add(session)
 
-        # Update Session
-        if data.get('status'):
-            session.status = data['status']
-
-        if data.get('ended_at'):
-            session.ended_at = datetime.fromisoformat(
-                data['ended_at'].replace('Z', '+00:00')
-            ) if isinstance(data['ended_at'], str) else data['ended_at']
-
-        if data.get('duration_seconds'):
-            session.duration_seconds = data['duration_seconds']
-
-        if data.get('transcript'):
-            session.transcript = data['transcript']
-
-        if data.get('summary'):
-            session.summary = data['summary']
-
-        if data.get('recording_url'):
-            session.recording_url = data['recording_url']
-
-        if data.get('cost'):
-            session.cost_amount = float(data['cost'])
-
-        if data.get('sentiment'):
-            session.sentiment = data['sentiment']
-
-        self.db.commit()
+        # Update Session direkt aus dem Payload
+        event_type = provider.apply_webhook(session, payload)
 
         # Bei Call-Ende: Interaction erstellen und Lead Score updaten
-        if data.get('event_type') in ['end-of-call-report', 'call_ended', 'completed']:
+        if event_type in _END_EVENTS:
             if session.customer_id:
                 # Interaction loggen
                 interaction = Interaction(
                     customer_id=session.customer_id,
                     type='call',
                     subject=f"AI Sales Call ({session.duration_seconds}s)",
-                    description=session.summary or session.transcript[:500] if session.transcript else None
+                    description=session.summary or self._transcript_preview(session)
                 )
                 self.db.add(interaction)
 
                 # Lead Score updaten
                 self._update_lead_score(session)
 
+        # Ein Commit für Session-Update, Interaction und Lead Score
+        if commit:
             self.db.commit()
 
         return session
 
-    def _update_lead_score(self, session: 'CallSession'):
-        """Aktualisiert Lead Score basierend auf Call."""
-        from voice_ai_models import LeadScore
+    def _transcript_preview(self, session: 'CallSession') -> Optional[str]:
+        """
+        Anfang des Transkripts für die Interaction-Beschreibung.
+        Liegt das Transkript schon an der Session, wird es direkt gekürzt;
+        sonst schneidet die DB zu, statt das (deferred) Volltranskript zu laden.
+        """
+        CallSession = _m('CallSession')
 
-        if not session.customer_id:
-            return
+        transcript = session.__dict__.get('transcript')
+        if transcript:
+            return transcript[:TRANSCRIPT_PREVIEW_LENGTH]
+
+        return self.db.execute(
+            select(func.substr(CallSession.transcript, 1, TRANSCRIPT_PREVIEW_LENGTH))
+            .where(CallSession.id == session.id)
+        ).scalar() or None
 
-        score = LeadScore.query.filter_by(customer_id=session.customer_id).first()
-        if not score:
-            score = LeadScore(customer_id=session.customer_id)
-            self.db.add(score)
+    def _update_lead_score(self, session: 'CallSession'):
+        """Aktualisiert Lead Score basierend auf Call."""
+        self.bulk_update_lead_scores([session])
 
-        # Einfache Scoring-Logik
-        sentiment_scores = {'positive': 20, 'neutral': 0, 'negative': -20}
-        delta = sentiment_scores.get(session.sentiment, 0)
+    @staticmethod
+    def _lead_score_deltas(session: 'CallSession') -> tuple:
+        """Einfache Scoring-Logik: (overall_delta, interest_delta) für einen Call."""
+        delta = _SENTIMENT_SCORES.get(session.sentiment, 0)
 
         # Längere Calls = mehr Interesse
         if session.duration_seconds:
@@ -694,16 +1074,81 @@ class VoiceAIService:
             elif session.duration_seconds > 60:  # > 1 Minute
                 delta += 5
 
-        score.overall_score = max(0, min(100, score.overall_score + delta))
+        interest = 15 if session.sentiment == 'positive' else 0
+        return delta, interest
+
+    def bulk_update_lead_scores(self, sessions: List['CallSession']) -> int:
+        """
+        Aktualisiert Lead Scores für viele Calls mit zwei Statements:
+        fehlende Zeilen per INSERT ... ON CONFLICT DO NOTHING anlegen, dann
+        ein UPDATE (executemany) mit Begrenzung auf 0-100 direkt in SQL.
+        Committet nicht; gibt die Anzahl berücksichtigter Calls zurück.
+        """
+        LeadScore = _m('LeadScore')
+
+        now = datetime.now(timezone.utc)
+        params = []
+        for session in sessions:
+            if not session.customer_id:
+                continue
+            delta, interest = self._lead_score_deltas(session)
+            params.append({
+                'cid': session.customer_id,
+                'delta': delta,
+                'interest': interest,
+                'now': now
+            })
 
-        if session.sentiment == 'positive':
-            score.interest_score = min(100, score.interest_score + 15)
+        if not params:
+            return 0
+
+        table = LeadScore.__table__
+        self._insert_missing_lead_scores(table, {p['cid'] for p in params})
+
+        overall = table.c.overall_score + bindparam('delta')
+        interest = table.c.interest_score + bindparam('interest')
+        self.db.execute(
+            update(table)
+            .where(table.c.customer_id == bindparam('cid'))
+            .values(
+                overall_score=case((overall > 100, 100), (overall < 0, 0), else_=overall),
+                interest_score=case((interest > 100, 100), else_=interest),
+                last_calculated=bindparam('now')
+            ),
+            params
+        )
+        return len(params)
+
+    def _insert_missing_lead_scores(self, table, customer_ids: set):
+        """Legt Lead-Score-Zeilen (Default-Werte) für neue Kunden an."""
+        dialect = self.db.get_bind().dialect.name
+        rows = [{'customer_id': cid} for cid in customer_ids]
+
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            self.db.execute(
+                upsert(table).on_conflict_do_nothing(index_elements=['customer_id']),
+                rows
+            )
+            return
 
-        score.last_calculated = datetime.now(timezone.utc)
+        existing = set(self.db.execute(
+            select(table.c.customer_id).where(table.c.customer_id.in_(customer_ids))
+        ).scalars())
+        rows = [row for row in rows if row['customer_id'] not in existing]
+        if rows:
+            self.db.execute(insert(table), rows)
 
     def get_queue_next(self, agent_id: int = None) -> Optional['CallQueue']:
-        """Holt den nächsten Anruf aus der Queue."""
-        from voice_ai_models import CallQueue
+        """
+        Holt den nächsten Anruf aus der Queue.
+        Die Zeile bleibt bis zum nächsten Commit gesperrt; andere Worker
+        überspringen sie (FOR UPDATE SKIP LOCKED).
+        """
+        CallQueue = _m('CallQueue')
 
         query = CallQueue.query.filter_by(status='pending')
 
@@ -713,12 +1158,12 @@ class VoiceAIService:
         return query.order_by(
             CallQueue.priority.asc(),
             CallQueue.created_at.asc()
-        ).first()
+        ).with_for_update(skip_locked=True).first()
 
     def add_to_queue(self, agent_id: int, customer_id: int, priority: int = 5,
                     scheduled_for: datetime = None) -> 'CallQueue':
         """Fügt Kunden zur Call-Queue hinzu."""
-        from voice_ai_models import CallQueue
+        CallQueue = _m('CallQueue')
 
         queue_item = CallQueue(
             agent_id=agent_id,
@@ -730,3 +1175,110 @@ class VoiceAIService:
         self.db.add(queue_item)
         self.db.commit()
         return queue_item
+
+    def add_to_queue_bulk(self, agent_id: int, customer_ids: List[int], priority: int = 5,
+                          scheduled_for: datetime = None, batch_size: int = 1000) -> int:
+        """
+        Fügt viele Kunden auf einmal zur Call-Queue hinzu.
+
+        Schreibt per mehrzeiligem INSERT (insertmanyvalues) in Blöcken von
+        batch_size statt einem INSERT + Commit pro Kunde.
+        Gibt die Anzahl der eingefügten Einträge zurück.
+        """
+        CallQueue = _m('CallQueue')
+
+        status = 'scheduled' if scheduled_for else 'pending'
+        count = 0
+
+        for start in range(0, len(customer_ids), batch_size):
+            rows = [
+                {
+                    'agent_id': agent_id,
+                    'customer_id': customer_id,
+                    'priority': priority,
+                    'scheduled_for': scheduled_for,
+                    'status': status
+                }
+                for customer_id in customer_ids[start:start + batch_size]
+            ]
+            self.db.execute(insert(CallQueue), rows)
+            count += len(rows)
+
+        self.db.commit()
+        return count
+
+    # =========================================================================
+    # WEBHOOK EVENTS (asynchrone Verarbeitung)
+    # =========================================================================
+
+    WEBHOOK_MAX_ATTEMPTS = 5
+    WEBHOOK_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+    def enqueue_webhook(self, provider_name: str, payload: Dict) -> int:
+        """
+        Speichert einen verifizierten Webhook zur späteren Verarbeitung.
+        Ein INSERT ... RETURNING ohne ORM-Objekt: nach dem Commit muss
+        nichts nachgeladen werden. Gibt die Event-ID zurück.
+        """
+        WebhookEvent = _m('WebhookEvent')
+
+        event_id = self.db.execute(
+            insert(WebhookEvent)
+            .values(provider=provider_name, payload=payload)
+            .returning(WebhookEvent.id)
+        ).scalar_one()
+        self.db.commit()
+        return event_id
+
+    def process_webhook_events(self, limit: int = 100) -> int:
+        """
+        Verarbeitet offene Webhook-Events (für den Worker-Prozess).
+
+        Events werden per SELECT ... FOR UPDATE SKIP LOCKED übernommen,
+        damit mehrere Worker parallel laufen können. Übernommene Events,
+        deren Worker abgestürzt ist, werden nach WEBHOOK_CLAIM_TIMEOUT
+        erneut vergeben. Gibt die Anzahl erfolgreich verarbeiteter Events zurück.
+        """
+        WebhookEvent = _m('WebhookEvent')
+
+        now = datetime.now(timezone.utc)
+        events = self.db.execute(
+            select(WebhookEvent)
+            .where(
+                WebhookEvent.processed_at.is_(None),
+                WebhookEvent.attempts < self.WEBHOOK_MAX_ATTEMPTS,
+                or_(WebhookEvent.claimed_at.is_(None),
+                    WebhookEvent.claimed_at < now - self.WEBHOOK_CLAIM_TIMEOUT)
+            )
+            .order_by(WebhookEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        if not events:
+            self.db.rollback()
+            return 0
+
+        for event in events:
+            event.claimed_at = now
+            event.attempts = (event.attempts or 0) + 1
+        self.db.commit()
+
+        processed = 0
+        for event in events:
+            try:
+                # Ergebnis und processed_at in einer Transaktion: ein Event
+                # ist entweder vollständig verarbeitet oder gar nicht
+                self.handle_webhook(event.provider, event.payload, commit=False)
+                event.processed_at = datetime.now(timezone.utc)
+                event.error = None
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                event.error = str(e)
+                event.claimed_at = None
+                self.db.commit()
+            else:
+                processed += 1
+
+        return processed